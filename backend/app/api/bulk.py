@@ -0,0 +1,87 @@
+import json
+from typing import Any, AsyncIterator, TypeVar
+from fastapi import HTTPException, Request, status
+from pydantic import BaseModel, ValidationError
+from pymongo import WriteConcern
+from app.models import BulkRowError
+
+T = TypeVar("T")
+
+NDJSON_MEDIA_TYPES = ("application/x-ndjson", "application/jsonl")
+
+INVALID_BULK_BODY = "Body must be a JSON array or newline-delimited JSON"
+UNACKNOWLEDGED_JOURNAL = "j=true needs an acknowledged write, w must not be 0"
+
+
+async def iter_rows(request: Request) -> AsyncIterator[Any]:
+    """
+    Yield the rows of a bulk request body.
+
+    NDJSON bodies are consumed as they stream in and each line is yielded as
+    raw bytes, left for the model to parse so one bad line is a row error.
+    Anything else must be a JSON array and is yielded element by element.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    if content_type in NDJSON_MEDIA_TYPES:
+        buffer = b""
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield line
+        if buffer.strip():
+            yield buffer
+        return
+
+    try:
+        rows = json.loads(await request.body())
+    except ValueError:
+        rows = None
+    if not isinstance(rows, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=INVALID_BULK_BODY
+        )
+    for row in rows:
+        yield row
+
+
+async def chunked(rows: AsyncIterator[T], size: int) -> AsyncIterator[list[T]]:
+    chunk: list[T] = []
+    async for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def validate_row(model: type[BaseModel], row: Any) -> BaseModel:
+    if isinstance(row, bytes):
+        return model.model_validate_json(row)
+    return model.model_validate(row)
+
+
+def row_error(index: int, error: ValidationError) -> BulkRowError:
+    message = "; ".join(
+        f"{'.'.join(str(loc) for loc in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    )
+    return BulkRowError(index=index, message=message)
+
+
+def write_concern(w: str | None, j: bool | None) -> WriteConcern | None:
+    """WriteConcern from the `w` and `j` query parameters, None for the default."""
+    if w is None and j is None:
+        return None
+    if w is not None and w != "majority":
+        if int(w) == 0 and j:
+            # pymongo refuses to build this one, answer before it raises. The
+            # 422 constant was renamed across the Starlette versions we allow
+            raise HTTPException(
+                status_code=422,
+                detail=UNACKNOWLEDGED_JOURNAL,
+            )
+        return WriteConcern(w=int(w), j=j)
+    return WriteConcern(w=w, j=j)
@@ -0,0 +1,78 @@
+from datetime import datetime, timezone
+from typing import Any
+from fastapi import Request, Response, status
+from app.api.responses import PydanticJSONResponse, type_adapter
+from app.core.cache import CachedResponse, response_cache
+from app.core.config import settings
+
+# Authenticated bodies: never shared caches, always revalidated
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(id: Any, updated_at: datetime) -> str:
+    """Strong ETag of a document version, from its id and updated_at."""
+    if updated_at.tzinfo is not None:
+        updated_at = updated_at.astimezone(timezone.utc).replace(tzinfo=None)
+    # Mongo keeps milliseconds, so versions read back compare equal
+    millis = updated_at.microsecond // 1000
+    stamp = f"{updated_at:%Y%m%d%H%M%S}{millis:03d}"
+    return f'"{id}-{stamp}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match lists `etag` (weak comparison)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = header.split(",")
+    return any(c.strip().removeprefix("W/") == etag for c in candidates)
+
+
+def conditional_response(request: Request, cached: CachedResponse) -> Response:
+    headers = {"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request, cached.etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return PydanticJSONResponse(cached.body, headers=headers)
+
+
+def cached_resource_response(
+    request: Request, resource: str, principal_id: str
+) -> Response | None:
+    """
+    Response for `resource` from the per-principal response cache, or None
+    when the cache is disabled or holds nothing for this principal.
+    """
+    if settings.RESPONSE_CACHE_TTL_SECONDS <= 0:
+        return None
+    entries = response_cache.get(resource)
+    cached = entries.get(principal_id) if entries else None
+    return conditional_response(request, cached) if cached else None
+
+
+def resource_response(
+    request: Request,
+    model: type[Any],
+    obj: Any,
+    *,
+    resource: str,
+    principal_id: str,
+) -> Response:
+    """
+    Serialize `obj` as `model` with an ETag, answering 304 when the client
+    already holds this version, and remember the body for `principal_id`.
+    """
+    adapter = type_adapter(model)
+    data = adapter.validate_python(obj, from_attributes=True)
+    etag = make_etag(data.id, data.updated_at)
+    cached = CachedResponse(etag, adapter.dump_json(data))
+
+    if settings.RESPONSE_CACHE_TTL_SECONDS > 0:
+        entries = response_cache.get(resource)
+        if entries is None:
+            entries = {}
+            ttl = settings.RESPONSE_CACHE_TTL_SECONDS
+            response_cache.set(resource, entries, ttl=ttl)
+        entries[principal_id] = cached
+    return conditional_response(request, cached)
@@ -1,14 +1,15 @@
+import time
 from typing import Annotated, AsyncGenerator
-import jwt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
-from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import ValidationError
 from app.core import security
+from app.core.cache import principal_cache
 from app.core.config import settings
-from app.models import TokenPayload, User, PyObjectId
-from pymongo_orm import AsyncMongoConnection
+from app.core.db import get_database
+from app.models import Principal, TokenPayload, User, PyObjectId
 
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -17,47 +18,87 @@ reusable_oauth2 = OAuth2PasswordBearer(
 
 
 async def get_db() -> AsyncGenerator[AsyncIOMotorDatabase, None]:
-    client = AsyncMongoConnection(settings.MONGODB_URI)
+    yield get_database()
 
-    db = client.get_db(db_name=settings.MONGODB_DB_NAME)
-    yield db
 
-
-DbDep = Annotated[AsyncIOMotorClient, Depends(get_db)]
+DbDep = Annotated[AsyncIOMotorDatabase, Depends(get_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-async def get_current_user(db: DbDep, token: TokenDep) -> User:
+def _decode_token(token: str) -> TokenPayload:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        token_data = TokenPayload(**payload)
+        token_data = security.decode_access_token(token)
     except (InvalidTokenError, ValidationError):
+        token_data = None
+    if token_data is None or token_data.sub is None:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
+    return token_data
 
-    user_id = PyObjectId.validate(token_data.sub)
-    user_data = await User.find_one(db=db, query={"_id": user_id})
 
-    if not user_data:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
-        )
-
-    if not user_data.is_active:
+def _ensure_active(is_active: bool) -> None:
+    if not is_active:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
+
+
+async def _load_user(db: AsyncIOMotorDatabase, token_data: TokenPayload) -> User:
+    user_data = principal_cache.get(token_data.sub)
+    if user_data is None:
+        user_id = PyObjectId.validate(token_data.sub)
+        # The whole document, password routes need hashed_password
+        user_data = await User.find_one(db=db, query={"_id": user_id})
+
+        if not user_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
+            )
+        principal_cache.set(token_data.sub, user_data.model_copy())
+    else:
+        # Handlers may mutate current_user, never hand out the cached instance
+        user_data = user_data.model_copy()
+
+    _ensure_active(user_data.is_active)
     return user_data
 
 
+async def get_current_user(db: DbDep, token: TokenDep) -> User:
+    """The caller's user document, for routes that need more than its role."""
+    return await _load_user(db, _decode_token(token))
+
+
+def _claims_are_fresh(token_data: TokenPayload) -> bool:
+    """Whether the role and active claims are recent enough to trust alone."""
+    if token_data.role is None or token_data.active is None or token_data.iat is None:
+        # Issued before tokens carried claims
+        return False
+    age = time.time() - token_data.iat
+    return age < settings.ACCESS_TOKEN_CLAIMS_TTL_MINUTES * 60
+
+
+async def get_current_principal(db: DbDep, token: TokenDep) -> Principal:
+    """
+    The caller from the access token's claims, without reading the user.
+    A deactivated or demoted user keeps the old claims for up to
+    ACCESS_TOKEN_CLAIMS_TTL_MINUTES, older tokens are checked against the user.
+    """
+    token_data = _decode_token(token)
+    if not _claims_are_fresh(token_data):
+        user = await _load_user(db, token_data)
+        return Principal(id=user.id, is_superuser=user.is_superuser)
+
+    _ensure_active(token_data.active)
+    return Principal(id=token_data.sub, is_superuser=token_data.role == "superuser")
+
+
 CurrentUser = Annotated[User, Depends(get_current_user)]
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+def get_current_active_superuser(current_user: CurrentPrincipal) -> Principal:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
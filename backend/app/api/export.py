@@ -0,0 +1,89 @@
+import csv
+import io
+from enum import Enum
+from typing import Any, AsyncIterator
+from fastapi.responses import StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorCursor
+from pydantic import BaseModel
+from app.api.responses import type_adapter
+from app.core.config import settings
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+async def _batches(
+    cursor: AsyncIOMotorCursor,
+) -> AsyncIterator[list[dict[str, Any]]]:
+    # Group rows by the cursor's batch size so each write to the socket
+    # carries a batch rather than a single row
+    batch = []
+    async for doc in cursor:
+        doc["id"] = str(doc.pop("_id"))
+        batch.append(doc)
+        if len(batch) >= settings.EXPORT_BATCH_SIZE:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+async def _ndjson(
+    model: type[BaseModel], cursor: AsyncIOMotorCursor
+) -> AsyncIterator[bytes]:
+    adapter = type_adapter(model)
+    async for batch in _batches(cursor):
+        yield b"".join(
+            adapter.dump_json(adapter.validate_python(doc)) + b"\n" for doc in batch
+        )
+
+
+async def _csv(
+    model: type[BaseModel], cursor: AsyncIOMotorCursor
+) -> AsyncIterator[str]:
+    adapter = type_adapter(model)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(model.model_fields))
+    writer.writeheader()
+    async for batch in _batches(cursor):
+        for doc in batch:
+            row = adapter.validate_python(doc)
+            writer.writerow(adapter.dump_python(row, mode="json"))
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def export_response(
+    model: type[BaseModel],
+    cursor: AsyncIOMotorCursor,
+    format: ExportFormat,
+    filename: str,
+) -> StreamingResponse:
+    """
+    Stream every document of `cursor` as `model` rows in `format`.
+
+    Rows are read, validated and written one cursor batch at a time, so
+    memory use does not grow with the size of the export.
+    """
+    if format is ExportFormat.ndjson:
+        rows = _ndjson(model, cursor)
+    else:
+        rows = _csv(model, cursor)
+    return StreamingResponse(
+        rows,
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}.{format.value}"'
+        },
+    )
@@ -0,0 +1,110 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Any
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException, status
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DESCENDING
+from pymongo_orm import AsyncMongoModel
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Sort used by list endpoints, _id breaks ties between equal created_at values
+KEYSET_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+
+INVALID_CURSOR = "Invalid cursor"
+
+
+class CountMode(str, Enum):
+    exact = "exact"
+    estimated = "estimated"
+    cached = "cached"
+    none = "none"
+
+
+# Exact counts keyed by collection and filter, used by CountMode.cached
+count_cache: TTLCache[str, int] = TTLCache(
+    maxsize=settings.COUNT_CACHE_SIZE, ttl=settings.COUNT_CACHE_TTL_SECONDS
+)
+
+
+def encode_cursor(created_at: datetime, id: Any) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor."""
+    raw = json.dumps(
+        {"created_at": created_at.isoformat(), "id": str(id)}, separators=(",", ":")
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def cursor_filter(cursor: str) -> dict[str, Any]:
+    """
+    Build the query filter selecting the rows that come after `cursor`
+    in KEYSET_SORT order.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = datetime.fromisoformat(data["created_at"])
+        last_id = ObjectId(data["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError, InvalidId):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail=INVALID_CURSOR
+        )
+
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}},
+        ]
+    }
+
+
+def split_page(
+    rows: list[dict[str, Any]], limit: int
+) -> tuple[list[dict[str, Any]], str | None]:
+    """
+    Trim a `limit + 1` fetch of raw documents back to `limit` rows and return
+    the cursor of the next page, or None when this is the last page.
+    """
+    if limit <= 0 or len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last["created_at"], last["id"])
+
+
+async def count_documents(
+    model: type[AsyncMongoModel],
+    db: AsyncIOMotorDatabase,
+    query: dict[str, Any],
+    mode: CountMode,
+) -> int | None:
+    """
+    Total for a list endpoint according to `mode`:
+
+    - **exact**: `count_documents` with the full filter
+    - **estimated**: collection metadata, only for unfiltered queries, otherwise exact
+    - **cached**: exact count reused for `COUNT_CACHE_TTL_SECONDS` per filter
+    - **none**: skip counting and return None
+    """
+    if mode is CountMode.none:
+        return None
+
+    if mode is CountMode.estimated and not query:
+        return await model.get_collection(db).estimated_document_count()
+
+    if mode is CountMode.cached:
+        collection = model.get_collection(db)
+        key = f"{collection.full_name}:{json.dumps(query, sort_keys=True, default=str)}"
+        count = count_cache.get(key)
+        if count is None:
+            count = await model.count(db=db, query=query)
+            count_cache.set(key, count)
+        return count
+
+    return await model.count(db=db, query=query)
@@ -0,0 +1,77 @@
+import math
+from typing import Annotated
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from app.api.deps import DbDep
+from app.core.rate_limit import (
+    Bucket,
+    RateLimiter,
+    email_bucket,
+    get_rate_limiter,
+    ip_bucket,
+)
+
+TOO_MANY_REQUESTS = "Too many attempts, retry later"
+
+
+def rate_limiter(db: DbDep) -> RateLimiter | None:
+    return get_rate_limiter(db)
+
+
+RateLimiterDep = Annotated[RateLimiter | None, Depends(rate_limiter)]
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy, run uvicorn with --proxy-headers so this is the real client
+    return request.client.host if request.client else "unknown"
+
+
+async def enforce(
+    limiter: RateLimiter | None, buckets: list[tuple[str, Bucket]]
+) -> None:
+    """Take a token from each bucket, answering 429 as soon as one is empty."""
+    if limiter is None:
+        return
+    for key, bucket in buckets:
+        retry_after = await limiter.take(key, bucket)
+        if retry_after:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail=TOO_MANY_REQUESTS,
+                headers={"Retry-After": str(math.ceil(retry_after))},
+            )
+
+
+# Route dependencies, they run before the handler so a rejected request never
+# reaches bcrypt, the users collection or SMTP
+
+
+async def limit_login(
+    request: Request,
+    limiter: RateLimiterDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
+) -> None:
+    await enforce(
+        limiter,
+        [
+            (f"login:ip:{client_ip(request)}", ip_bucket()),
+            (f"login:email:{form_data.username.lower()}", email_bucket()),
+        ],
+    )
+
+
+async def limit_password_recovery(
+    request: Request, limiter: RateLimiterDep, email: str
+) -> None:
+    await enforce(
+        limiter,
+        [
+            (f"password-recovery:ip:{client_ip(request)}", ip_bucket()),
+            (f"password-recovery:email:{email.lower()}", email_bucket()),
+        ],
+    )
+
+
+async def limit_reset_password(request: Request, limiter: RateLimiterDep) -> None:
+    # The email is only known once the reset token is verified, limit by IP
+    await enforce(limiter, [(f"reset-password:ip:{client_ip(request)}", ip_bucket())])
@@ -0,0 +1,28 @@
+from functools import lru_cache
+from typing import Any, TypeVar
+from fastapi import Response
+from pydantic import TypeAdapter
+
+T = TypeVar("T")
+
+
+@lru_cache
+def type_adapter(model: type[T]) -> TypeAdapter[T]:
+    return TypeAdapter(model)
+
+
+class PydanticJSONResponse(Response):
+    """JSON response whose body was already serialized to bytes by pydantic-core."""
+
+    media_type = "application/json"
+
+
+def validated_json_response(model: type[Any], data: Any) -> PydanticJSONResponse:
+    """
+    Validate raw Mongo data once against `model` and serialize it straight to
+    JSON bytes, bypassing FastAPI's response_model re-validation and
+    jsonable_encoder. ObjectId and datetime values go through the model's
+    own serializers.
+    """
+    adapter = type_adapter(model)
+    return PydanticJSONResponse(adapter.dump_json(adapter.validate_python(data)))
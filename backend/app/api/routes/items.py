@@ -1,14 +1,48 @@
-from typing import Any
-from fastapi import APIRouter, HTTPException, status
-from app.api.deps import CurrentUser, DbDep
+import asyncio
+from datetime import datetime, timezone
+from typing import Annotated, Any
+from bson import ObjectId
+from fastapi import APIRouter, HTTPException, Query, Request, status
+from pydantic import ValidationError
+from app import crud
+from app.api.bulk import (
+    NDJSON_MEDIA_TYPES,
+    chunked,
+    iter_rows,
+    row_error,
+    validate_row,
+    write_concern,
+)
+from app.api.conditional import cached_resource_response, resource_response
+from app.api.deps import CurrentPrincipal, CurrentUser, DbDep
+from app.api.export import ExportFormat, export_response
+from app.api.pagination import (
+    KEYSET_SORT,
+    CountMode,
+    count_documents,
+    cursor_filter,
+    split_page,
+)
+from app.api.responses import validated_json_response
+from app.api.search import SEARCH_NOT_PAGEABLE, TEXT_SCORE_SORT, search_filter
+from app.core.cache import invalidate_response, response_cache
+from app.core.config import settings
 from app.models import (
+    BulkOutcome,
+    BulkRowError,
     Item,
     ItemCreate,
     ItemPublic,
+    ItemsBulkDelete,
+    ItemsBulkResult,
+    ItemsBulkUpdate,
+    ItemsBulkWriteResult,
+    ItemsFilter,
     ItemsPublic,
     ItemUpdate,
     Message,
     PyObjectId,
+    projection_for,
 )
 
 
@@ -19,14 +53,26 @@ ITEM_NOT_FOUND = "Item not found"
 NOT_ENOUGH_PERMISSIONS = "Not enough permissions"
 
 
+def _owner_filter(current_user: CurrentPrincipal) -> dict[str, Any]:
+    return {} if current_user.is_superuser else {"owner_id": current_user.id}
+
+
 @router.get("/", response_model=ItemsPublic)
 async def read_items(
-    db: DbDep, current_user: CurrentUser, skip: int = 0, limit: int = 100, q: str = None
+    db: DbDep,
+    current_user: CurrentPrincipal,
+    skip: int = 0,
+    limit: int = 100,
+    q: str = None,
+    after: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = CountMode.exact,
 ) -> Any:
     """
     Retrieve items with optional search filtering.
 
     - **q**: Optional search query for filtering items by title or description
+    - **after**: Optional `next_cursor` from a previous page; takes precedence over `skip`
+    - **count**: `exact` (default), `estimated`, `cached` or `none` to skip the total
     """
     # Base filter depending on user permissions
     if current_user.is_superuser:
@@ -35,53 +81,109 @@ async def read_items(
         base_filter = {"owner_id": current_user.id}
 
     # Add search query if provided
+    sort = KEYSET_SORT
     if q:
-        # Create a text search filter for title and description fields
-        search_filter = {
-            "$or": [
-                {
-                    "title": {"$regex": q, "$options": "i"}
-                },  # Case-insensitive search in title
-                {
-                    "description": {"$regex": q, "$options": "i"}
-                },  # Case-insensitive search in description
-            ]
-        }
+        # Search title and description, through the items text index by default
+        search = await search_filter(
+            q, fields=("title", "description"), collection=Item.get_collection(db)
+        )
 
         # Combine base filter with search filter
-        filter_query = {"$and": [base_filter, search_filter]}
+        filter_query = {"$and": [base_filter, search]}
+        if "$text" in search:
+            # Text matches come back by relevance and can only be paged with skip
+            if after:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=SEARCH_NOT_PAGEABLE,
+                )
+            sort = TEXT_SCORE_SORT + KEYSET_SORT
     else:
         filter_query = base_filter
 
-    # Get count of matching documents
-    count = await Item.count(db=db, query=filter_query)
+    # Keyset pagination: seek past the cursor instead of skipping documents
+    page_query = filter_query
+    if after:
+        page_query = {"$and": [filter_query, cursor_filter(after)]}
+        skip = 0
 
-    # Find matching items with pagination
-    items_cursor = await Item.find(
-        db=db, query=filter_query, skip=skip, limit=limit, sort=[("created_at", -1)]
+    # Count matching documents while the page query runs, the page fetches
+    # one extra row to tell whether there is a next page
+    count, items = await asyncio.gather(
+        count_documents(Item, db, filter_query, count_mode),
+        # Raw documents holding only the fields ItemPublic declares
+        crud.find_documents(
+            ItemPublic,
+            db=db,
+            query=page_query,
+            projection=projection_for(ItemPublic),
+            skip=skip,
+            limit=limit + 1 if limit > 0 else 0,
+            sort=sort,
+        ),
     )
+    items, next_cursor = split_page(items, limit)
+    if sort is not KEYSET_SORT:
+        next_cursor = None
 
-    # Transform to Pydantic models
-    items = [ItemPublic(**item.model_dump()) for item in items_cursor]
+    # Validate the raw documents once and serialize them straight to JSON bytes
+    return validated_json_response(
+        ItemsPublic, {"data": items, "count": count, "next_cursor": next_cursor}
+    )
 
-    return ItemsPublic(data=items, count=count)
+
+@router.get("/export")
+async def export_items(
+    db: DbDep,
+    current_user: CurrentPrincipal,
+    format: ExportFormat = ExportFormat.ndjson,
+    q: str | None = None,
+) -> Any:
+    """
+    Stream every item visible to the caller, newest first.
+
+    - **format**: `ndjson` (default) or `csv`
+    - **q**: Optional search query for filtering items by title or description
+    """
+    filter_query = _owner_filter(current_user)
+    if q:
+        search = await search_filter(
+            q, fields=("title", "description"), collection=Item.get_collection(db)
+        )
+        filter_query = {"$and": [filter_query, search]}
+
+    cursor = (
+        Item.get_collection(db)
+        .find(filter_query, projection_for(ItemPublic), sort=KEYSET_SORT)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+    return export_response(ItemPublic, cursor, format, "items")
 
 
 @router.get("/{id}", response_model=ItemPublic)
-async def read_item(db: DbDep, current_user: CurrentUser, id: PyObjectId) -> Any:
+async def read_item(
+    request: Request, db: DbDep, current_user: CurrentPrincipal, id: PyObjectId
+) -> Any:
     """
-    Get item by ID.
+    Get item by ID. Sends an ETag and answers `If-None-Match` with 304.
     """
+    resource = f"items:{id}"
+    cached = cached_resource_response(request, resource, current_user.id)
+    if cached:
+        return cached
+
     item = await Item.find_one(db=db, query={"_id": id})
     if not item:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail=ITEM_NOT_FOUND
         )
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
+    if not current_user.is_superuser and str(item.owner_id) != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail=NOT_ENOUGH_PERMISSIONS
         )
-    return item
+    return resource_response(
+        request, ItemPublic, item, resource=resource, principal_id=current_user.id
+    )
 
 
 @router.post("/", response_model=ItemPublic)
@@ -91,45 +193,257 @@ async def create_item(
     """
     Create new item.
     """
-    item_data = item_in.model_dump()
-    item_data["owner_id"] = current_user.id
-    create_item = await Item(**item_data).save(db)
+    # The owner is read, not taken from the token's claims: a deleted user's
+    # token must not add items behind their cascade delete
+    return await crud.create_item(db=db, item_in=item_in, owner_id=current_user.id)
+
+
+# The body is read from the raw request, document both accepted encodings
+_BULK_ROWS_SCHEMA = {"$ref": "#/components/schemas/ItemCreate"}
+_BULK_REQUEST_BODY = {
+    "required": True,
+    "content": {
+        "application/json": {"schema": {"type": "array", "items": _BULK_ROWS_SCHEMA}},
+        **{
+            media_type: {"schema": _BULK_ROWS_SCHEMA}
+            for media_type in NDJSON_MEDIA_TYPES
+        },
+    },
+}
+
+
+@router.post(
+    "/bulk",
+    response_model=ItemsBulkResult,
+    openapi_extra={"requestBody": _BULK_REQUEST_BODY},
+)
+async def create_items_bulk(
+    request: Request,
+    db: DbDep,
+    # Read like create_item's owner, see there
+    current_user: CurrentUser,
+    ordered: bool = False,
+    chunk_size: Annotated[
+        int, Query(ge=1, le=settings.BULK_MAX_CHUNK_SIZE)
+    ] = settings.BULK_CHUNK_SIZE,
+    w: Annotated[str | None, Query(pattern=r"^(majority|\d+)$")] = None,
+    j: bool | None = None,
+) -> Any:
+    """
+    Create many items from a JSON array or an NDJSON stream
+    (`Content-Type: application/x-ndjson`).
+
+    - **ordered**: Stop at the first invalid or rejected row instead of skipping it
+    - **chunk_size**: Rows validated and written per `insert_many`
+    - **w**, **j**: Write concern for the inserts, the server default if unset
+
+    Rows that fail validation or are rejected by the server are reported in
+    `errors` by their position in the body.
+    """
+    concern = write_concern(w, j)
+    inserted_count = 0
+    errors: list[BulkRowError] = []
+
+    index = 0
+    async for chunk in chunked(iter_rows(request), chunk_size):
+        # Position in the body of each row that passed validation
+        positions: list[int] = []
+        items_in: list[ItemCreate] = []
+        stop = False
+        for row in chunk:
+            try:
+                items_in.append(validate_row(ItemCreate, row))
+                positions.append(index)
+            except ValidationError as e:
+                errors.append(row_error(index, e))
+                if ordered:
+                    stop = True
+                    break
+            index += 1
+
+        if items_in:
+            inserted, write_errors = await crud.create_items(
+                db=db,
+                items_in=items_in,
+                owner_id=current_user.id,
+                ordered=ordered,
+                write_concern=concern,
+            )
+            inserted_count += inserted
+            errors.extend(
+                BulkRowError(index=positions[e["index"]], message=e["errmsg"])
+                for e in write_errors
+            )
+            stop = stop or (ordered and bool(write_errors))
+        if stop:
+            break
+
+    errors.sort(key=lambda error: error.index)
+    return ItemsBulkResult(inserted_count=inserted_count, errors=errors)
+
+
+async def _filter_query(
+    db: DbDep, items_filter: ItemsFilter, current_user: CurrentPrincipal
+) -> dict[str, Any]:
+    clauses = [_owner_filter(current_user)]
+    if items_filter.q:
+        clauses.append(
+            await search_filter(
+                items_filter.q,
+                fields=("title", "description"),
+                collection=Item.get_collection(db),
+            )
+        )
+    if items_filter.owner_id:
+        clauses.append({"owner_id": str(items_filter.owner_id)})
+    return {"$and": clauses}
+
+
+async def _outcomes(
+    db: DbDep, current_user: CurrentPrincipal, ids: list[ObjectId], done: str
+) -> dict[ObjectId, str]:
+    """
+    Outcome of each of `ids` from a single read of their owners: `done` for
+    the items the caller may write, otherwise not_found or forbidden.
+    """
+    docs = await crud.find_documents(
+        Item, db=db, query={"_id": {"$in": ids}}, projection={"owner_id": 1}
+    )
+    owners = {ObjectId(doc["id"]): doc["owner_id"] for doc in docs}
+    outcomes = {}
+    for id in ids:
+        if id not in owners:
+            outcomes[id] = "not_found"
+        elif current_user.is_superuser or owners[id] == current_user.id:
+            outcomes[id] = done
+        else:
+            outcomes[id] = "forbidden"
+    return outcomes
+
+
+@router.patch("/bulk", response_model=ItemsBulkWriteResult)
+async def update_items_bulk(
+    *, db: DbDep, current_user: CurrentPrincipal, body: ItemsBulkUpdate
+) -> Any:
+    """
+    Update many items in one write.
+
+    - **items**: Per-item changes, each with the `id` of the item to update
+    - **filter**, **update**: One change applied to every matching item
+
+    Items the caller does not own are excluded by the write filter itself;
+    requests by id get a per-id outcome.
+    """
+    if body.filter is not None:
+        update_data = body.update.model_dump(exclude={"id"}, exclude_unset=True)
+        update_data["updated_at"] = datetime.now(timezone.utc)
+        result = await Item.get_collection(db).update_many(
+            await _filter_query(db, body.filter, current_user), {"$set": update_data}
+        )
+        # The matched ids are unknown, drop every cached response
+        response_cache.clear()
+        return ItemsBulkWriteResult(count=result.matched_count)
+
+    ids = list(dict.fromkeys(item_in.id for item_in in body.items))
+    if not ids:
+        return ItemsBulkWriteResult(count=0)
+    matched = await crud.update_items(
+        db=db, items_in=body.items, query=_owner_filter(current_user)
+    )
+    for id in ids:
+        invalidate_response(f"items:{id}")
+
+    # Every update matched, no need to find out which ids were skipped
+    if matched == len(body.items):
+        outcomes = dict.fromkeys(ids, "updated")
+    else:
+        outcomes = await _outcomes(db, current_user, ids, "updated")
+    return ItemsBulkWriteResult(
+        count=matched,
+        results=[BulkOutcome(id=str(id), status=outcomes[id]) for id in ids],
+    )
+
+
+@router.delete("/bulk", response_model=ItemsBulkWriteResult)
+async def delete_items_bulk(
+    *, db: DbDep, current_user: CurrentPrincipal, body: ItemsBulkDelete
+) -> Any:
+    """
+    Delete many items with a single `delete_many`.
+
+    - **ids**: Items to delete, each gets a per-id outcome
+    - **filter**: Delete every matching item
+
+    Items the caller does not own are excluded by the delete filter itself.
+    """
+    collection = Item.get_collection(db)
+    if body.filter is not None:
+        result = await collection.delete_many(
+            await _filter_query(db, body.filter, current_user)
+        )
+        response_cache.clear()
+        return ItemsBulkWriteResult(count=result.deleted_count)
+
+    ids = list(dict.fromkeys(body.ids))
+    if not ids:
+        return ItemsBulkWriteResult(count=0)
 
-    created_item = await Item.find_one(db=db, query={"_id": create_item.id})
-    return Item(**created_item.model_dump())
+    # Deleted documents cannot be told apart from missing ones afterwards,
+    # so the per-id report comes from one read made before the delete
+    outcomes = await _outcomes(db, current_user, ids, "deleted")
+    deletable = [id for id in ids if outcomes[id] == "deleted"]
+    deleted = 0
+    if deletable:
+        result = await collection.delete_many(
+            {"_id": {"$in": deletable}, **_owner_filter(current_user)}
+        )
+        deleted = result.deleted_count
+        for id in deletable:
+            invalidate_response(f"items:{id}")
+    return ItemsBulkWriteResult(
+        count=deleted,
+        results=[BulkOutcome(id=str(id), status=outcomes[id]) for id in ids],
+    )
 
 
 @router.put("/{id}", response_model=ItemPublic)
 async def update_item(
     *,
     db: DbDep,
-    current_user: CurrentUser,
+    current_user: CurrentPrincipal,
     id: PyObjectId,
     item_in: ItemUpdate,
 ) -> Any:
     """
     Update an item.
     """
-    item = await Item.find_one(db=db, query={"_id": id})
-    if not item:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND, detail=ITEM_NOT_FOUND
-        )
-
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST, detail=NOT_ENOUGH_PERMISSIONS
-        )
+    # Ownership is part of the filter, so the happy path is a single round-trip
+    query = {"_id": id}
+    if not current_user.is_superuser:
+        query["owner_id"] = current_user.id
 
     update_data = item_in.model_dump(exclude_unset=True)
+    item = await crud.find_one_and_update(
+        Item, db=db, query=query, update={"$set": update_data}
+    )
+    if item:
+        invalidate_response(f"items:{id}")
+        return item
 
-    await Item.update_many(db=db, query={"_id": id}, update={"$set": update_data})
-
-    return await Item.find_one(db=db, query={"_id": id})
+    # Nothing matched, find out whether the item is missing or not ours
+    if not await Item.find_one(db=db, query={"_id": id}):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=ITEM_NOT_FOUND
+        )
+    raise HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST, detail=NOT_ENOUGH_PERMISSIONS
+    )
 
 
 @router.delete("/{id}")
-async def delete_item(db: DbDep, current_user: CurrentUser, id: PyObjectId) -> Message:
+async def delete_item(
+    db: DbDep, current_user: CurrentPrincipal, id: PyObjectId
+) -> Message:
     """
     Delete an item.
     """
@@ -139,10 +453,11 @@ async def delete_item(db: DbDep, current_user: CurrentUser, id: PyObjectId) -> M
             status_code=status.HTTP_404_NOT_FOUND, detail="Item not found"
         )
 
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
+    if not current_user.is_superuser and str(item.owner_id) != current_user.id:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Not enough permissions"
         )
 
     await item.delete(db)
+    invalidate_response(f"items:{id}")
     return Message(message="Item deleted successfully")
@@ -1,30 +1,48 @@
-from datetime import timedelta
 from typing import Annotated, Any
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from app import crud
 from app.api.deps import CurrentUser, DbDep, get_current_active_superuser
+from app.api.rate_limit import (
+    limit_login,
+    limit_password_recovery,
+    limit_reset_password,
+)
 from app.core import security
-from app.core.config import settings
-from app.core.security import get_password_hash
-from app.models import Message, NewPassword, Token, UserPublic
+from app.core.cache import invalidate_principal
+from app.core.refresh_tokens import (
+    issue_refresh_token,
+    revoke_refresh_tokens,
+    rotate_refresh_token,
+)
+from app.core.security import get_password_hash_async
+from app.models import (
+    Message,
+    NewPassword,
+    PyObjectId,
+    RefreshTokenRequest,
+    Token,
+    User,
+    UserPublic,
+)
 from app.utils import (
     generate_password_reset_token,
     generate_reset_password_email,
-    send_email,
+    send_email_async,
     verify_password_reset_token,
 )
 
 router = APIRouter(tags=["login"])
 
 
-@router.post("/login/access-token")
+@router.post("/login/access-token", dependencies=[Depends(limit_login)])
 async def login_access_token(
     db: DbDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
 ) -> Token:
     """
-    OAuth2 compatible token login, get an access token for future requests
+    OAuth2 compatible token login, get an access token for future requests.
+    Rate limited per client IP and per email.
     """
     user = await crud.authenticate(
         db=db, email=form_data.username, password=form_data.password
@@ -40,11 +58,40 @@ async def login_access_token(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     return Token(
-        access_token=security.create_access_token(
-            str(user.id), expires_delta=access_token_expires
-        ),
+        access_token=security.create_user_access_token(user),
+        refresh_token=await issue_refresh_token(db, user.id),
+        id=str(user.id),
+        full_name=user.full_name,
+        email=user.email,
+    )
+
+
+@router.post("/login/refresh-token")
+async def refresh_access_token(db: DbDep, body: RefreshTokenRequest) -> Token:
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+    The refresh token sent is spent; sending it again ends the session.
+    """
+    rotated = await rotate_refresh_token(db, body.refresh_token)
+    if rotated is None:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid refresh token",
+        )
+
+    user_id, refresh_token = rotated
+    user = await User.find_one(db=db, query={"_id": PyObjectId.validate(user_id)})
+    if not user or not user.is_active:
+        await revoke_refresh_tokens(db, user_id)
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid refresh token",
+        )
+
+    return Token(
+        access_token=security.create_user_access_token(user),
+        refresh_token=refresh_token,
         id=str(user.id),
         full_name=user.full_name,
         email=user.email,
@@ -59,10 +106,12 @@ async def test_token(current_user: CurrentUser) -> Any:
     return current_user
 
 
-@router.post("/password-recovery/{email}")
+@router.post(
+    "/password-recovery/{email}", dependencies=[Depends(limit_password_recovery)]
+)
 async def recover_password(email: str, db: DbDep) -> Message:
     """
-    Password Recovery
+    Password Recovery. Rate limited per client IP and per email.
     """
     user = await crud.get_user_by_email(db=db, email=email)
 
@@ -77,7 +126,8 @@ async def recover_password(email: str, db: DbDep) -> Message:
         email_to=user.email, email=email, token=password_reset_token
     )
 
-    send_email(
+    await send_email_async(
+        db=db,
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -85,10 +135,10 @@ async def recover_password(email: str, db: DbDep) -> Message:
     return Message(message="Password recovery email sent")
 
 
-@router.post("/reset-password/")
+@router.post("/reset-password/", dependencies=[Depends(limit_reset_password)])
 async def reset_password(db: DbDep, body: NewPassword) -> Message:
     """
-    Reset password
+    Reset password. Rate limited per client IP.
     """
     email = verify_password_reset_token(token=body.token)
     if not email:
@@ -107,8 +157,10 @@ async def reset_password(db: DbDep, body: NewPassword) -> Message:
             status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user"
         )
 
-    user.hashed_password = get_password_hash(password=body.new_password)
+    user.hashed_password = await get_password_hash_async(password=body.new_password)
     await user.save(db)
+    invalidate_principal(user.id)
+    await revoke_refresh_tokens(db, user.id)
 
     return Message(message="Password updated successfully")
 
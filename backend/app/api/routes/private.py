@@ -2,7 +2,7 @@ from typing import Any
 from fastapi import APIRouter
 from pydantic import BaseModel
 from app.api.deps import DbDep
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash_async
 from app.models import (
     User,
     UserPublic,
@@ -27,7 +27,7 @@ async def create_user(user_in: PrivateUserCreate, db: DbDep) -> Any:
     user = await User(
         email=user_in.email,
         full_name=user_in.full_name,
-        hashed_password=get_password_hash(user_in.password),
+        hashed_password=await get_password_hash_async(user_in.password),
     ).save(db)
 
     return user
@@ -1,15 +1,49 @@
-from typing import Any
-from fastapi import APIRouter, Depends, HTTPException, status
+import asyncio
+from typing import Annotated, Any
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    HTTPException,
+    Query,
+    Request,
+    status,
+)
 from app import crud
+from app.api.conditional import cached_resource_response, resource_response
 from app.api.deps import (
+    CurrentPrincipal,
     CurrentUser,
     DbDep,
     get_current_active_superuser,
 )
+from app.api.export import ExportFormat, export_response
+from app.api.pagination import (
+    KEYSET_SORT,
+    CountMode,
+    count_documents,
+    cursor_filter,
+    split_page,
+)
+from app.api.responses import validated_json_response
+from app.api.search import (
+    SEARCH_NOT_PAGEABLE,
+    TEXT_SCORE_SORT,
+    email_prefix_filter,
+    search_filter,
+)
+from app.core.cache import invalidate_principal, response_cache
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.deletion_jobs import (
+    enqueue_user_deletion,
+    release_user_deletion,
+    run_deletion_jobs,
+)
+from app.core.refresh_tokens import revoke_refresh_tokens
+from app.core.security import get_password_hash_async, verify_password_async
 from app.models import (
-    Item,
+    DeletionJob,
+    DeletionJobPublic,
     Message,
     UpdatePassword,
     User,
@@ -18,9 +52,11 @@ from app.models import (
     UsersPublic,
     UserUpdate,
     UserUpdateMe,
+    UserDeleted,
     PyObjectId,
+    projection_for,
 )
-from app.utils import generate_new_account_email, send_email
+from app.utils import generate_new_account_email, send_email_async
 
 
 router = APIRouter(prefix="/users", tags=["users"])
@@ -31,43 +67,100 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-async def read_users(db: DbDep, skip: int = 0, limit: int = 100, q: str = None) -> Any:
+async def read_users(
+    db: DbDep,
+    skip: int = 0,
+    limit: int = 100,
+    q: str = None,
+    after: str | None = None,
+    count_mode: Annotated[CountMode, Query(alias="count")] = CountMode.exact,
+) -> Any:
     """
     Retrieve users.
+
+    - **after**: Optional `next_cursor` from a previous page; takes precedence over `skip`
+    - **count**: `exact` (default), `estimated`, `cached` or `none` to skip the total
     """
 
     # Add search query if provided
     base_filter = {}
+    sort = KEYSET_SORT
     if q:
-
-        search_filter = {
-            "$or": [
-                {
-                    "full_name": {"$regex": q, "$options": "i"}
-                },  # Case-insensitive search in name
-                {
-                    "email": {"$regex": q, "$options": "i"}
-                },  # Case-insensitive search in email
-            ]
-        }
+        # Email-like input is an anchored prefix on the email index, anything
+        # else searches full_name and email through the users text index
+        search = email_prefix_filter(q) or await search_filter(
+            q, fields=("full_name", "email"), collection=User.get_collection(db)
+        )
 
         # Combine base filter with search filter
-        filter_query = {"$and": [base_filter, search_filter]}
+        filter_query = {"$and": [base_filter, search]}
+        if "$text" in search:
+            # Text matches come back by relevance and can only be paged with skip
+            if after:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=SEARCH_NOT_PAGEABLE,
+                )
+            sort = TEXT_SCORE_SORT + KEYSET_SORT
     else:
         filter_query = base_filter
 
-    # Get count of matching documents
-    count = await User.count(db=db, query=filter_query)
+    # Keyset pagination: seek past the cursor instead of skipping documents
+    page_query = filter_query
+    if after:
+        page_query = {"$and": [filter_query, cursor_filter(after)]}
+        skip = 0
+
+    # Count matching documents while the page query runs, the page fetches
+    # one extra row to tell whether there is a next page
+    count, users = await asyncio.gather(
+        count_documents(User, db, filter_query, count_mode),
+        # Raw documents with only UserPublic's fields, never hashed_password
+        crud.find_documents(
+            UserPublic,
+            db=db,
+            query=page_query,
+            projection=projection_for(UserPublic),
+            limit=limit + 1 if limit > 0 else 0,
+            skip=skip,
+            sort=sort,
+        ),
+    )
+    users, next_cursor = split_page(users, limit)
+    if sort is not KEYSET_SORT:
+        next_cursor = None
 
-    # Find matching items with pagination
-    users_cursor = await User.find(
-        db=db, query=filter_query, limit=limit, skip=skip, sort=[("created_at", -1)]
+    # Validate the raw documents once and serialize them straight to JSON bytes
+    return validated_json_response(
+        UsersPublic, {"data": users, "count": count, "next_cursor": next_cursor}
     )
 
-    # Transform to Pydantic models
-    users = [UserPublic(**user.model_dump()) for user in users_cursor]
 
-    return UsersPublic(data=users, count=count)
+@router.get("/export", dependencies=[Depends(get_current_active_superuser)])
+async def export_users(
+    db: DbDep,
+    format: ExportFormat = ExportFormat.ndjson,
+    q: str | None = None,
+) -> Any:
+    """
+    Stream every user, newest first.
+
+    - **format**: `ndjson` (default) or `csv`
+    - **q**: Optional search query, as in `GET /users/`
+    """
+    filter_query = {}
+    if q:
+        filter_query = email_prefix_filter(q) or await search_filter(
+            q, fields=("full_name", "email"), collection=User.get_collection(db)
+        )
+
+    # Only UserPublic's fields are read, never hashed_password
+    cursor = (
+        User.get_collection(db)
+        .find(filter_query, projection_for(UserPublic), sort=KEYSET_SORT)
+        .batch_size(settings.EXPORT_BATCH_SIZE)
+    )
+    return export_response(UserPublic, cursor, format, "users")
 
 
 @router.post(
@@ -89,7 +182,8 @@ async def create_user(*, db: DbDep, user_in: UserCreate) -> Any:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        send_email(
+        await send_email_async(
+            db=db,
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -116,11 +210,11 @@ async def update_user_me(
 
     update_data = user_in.model_dump(exclude_unset=True)
 
-    await User.update_many(
-        db=db, query={"_id": current_user.id}, update={"$set": update_data}
+    updated_user = await crud.find_one_and_update(
+        User, db=db, query={"_id": current_user.id}, update={"$set": update_data}
     )
-
-    return await User.find_one(db=db, query={"_id": current_user.id})
+    invalidate_principal(current_user.id)
+    return updated_user
 
 
 @router.patch("/me/password", response_model=Message)
@@ -130,7 +224,9 @@ async def update_password_me(
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await verify_password_async(
+        body.current_password, current_user.hashed_password
+    ):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Incorrect password"
         )
@@ -140,27 +236,41 @@ async def update_password_me(
             detail="New password cannot be the same as the current one",
         )
 
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await get_password_hash_async(body.new_password)
     await User.update_many(
         db=db,
         query={"_id": current_user.id},
         update={"$set": {"hashed_password": hashed_password}},
     )
+    invalidate_principal(current_user.id)
+    await revoke_refresh_tokens(db, current_user.id)
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-async def read_user_me(current_user: CurrentUser) -> Any:
+async def read_user_me(request: Request, current_user: CurrentUser) -> Any:
     """
-    Get current user.
+    Get current user. Sends an ETag and answers `If-None-Match` with 304.
     """
-    return current_user
+    resource = f"users:{current_user.id}"
+    cached = cached_resource_response(request, resource, current_user.id)
+    if cached:
+        return cached
+    return resource_response(
+        request,
+        UserPublic,
+        current_user,
+        resource=resource,
+        principal_id=current_user.id,
+    )
 
 
-@router.delete("/me", response_model=Message)
-async def delete_user_me(db: DbDep, current_user: CurrentUser) -> Any:
+@router.delete("/me", response_model=UserDeleted)
+async def delete_user_me(
+    db: DbDep, current_user: CurrentUser, background_tasks: BackgroundTasks
+) -> Any:
     """
-    Delete own user.
+    Delete own user. Owned items are removed by a background job.
     """
     if current_user.is_superuser:
         raise HTTPException(
@@ -168,18 +278,51 @@ async def delete_user_me(db: DbDep, current_user: CurrentUser) -> Any:
             detail="Super users are not allowed to delete themselves",
         )
 
+    # The job is recorded before the user goes, so a crash cannot orphan items,
+    # and only released once the user is gone
+    job = await enqueue_user_deletion(db, current_user.id)
     await current_user.delete(db)
-    return Message(message="User deleted successfully")
+    await release_user_deletion(db, job)
+    invalidate_principal(current_user.id)
+    await revoke_refresh_tokens(db, current_user.id)
+    # Cached bodies of the user's items go with them
+    response_cache.clear()
+    background_tasks.add_task(run_deletion_jobs, db)
+    return UserDeleted(message="User deleted successfully", job_id=job.id)
+
+
+@router.get(
+    "/deletion-jobs/{job_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=DeletionJobPublic,
+)
+async def read_deletion_job(db: DbDep, job_id: PyObjectId) -> Any:
+    """
+    Get the progress of the cascade delete started by a user removal.
+    """
+    job = await DeletionJob.find_one(db=db, query={"_id": job_id})
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Deletion job not found"
+        )
+    return job
 
 
 @router.get("/{user_id}", response_model=UserPublic)
 async def read_user_by_id(
-    user_id: PyObjectId, db: DbDep, current_user: CurrentUser
+    request: Request, user_id: PyObjectId, db: DbDep, current_user: CurrentPrincipal
 ) -> Any:
     """
-    Get a specific user by id.
+    Get a specific user by id. Sends an ETag and answers `If-None-Match` with 304.
     """
-    user = await User.find_one(db=db, query={"_id": user_id})
+    resource = f"users:{user_id}"
+    cached = cached_resource_response(request, resource, current_user.id)
+    if cached:
+        return cached
+
+    user = await UserPublic.find_one(
+        db=db, query={"_id": user_id}, projection=projection_for(UserPublic)
+    )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="User not found"
@@ -190,7 +333,9 @@ async def read_user_by_id(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="The user doesn't have enough privileges",
         )
-    return user
+    return resource_response(
+        request, UserPublic, user, resource=resource, principal_id=current_user.id
+    )
 
 
 @router.patch(
@@ -225,15 +370,25 @@ async def update_user(
     updated_user = await crud.update_user(
         db=db, db_user=User(**db_user.model_dump()), user_in=user_in
     )
+    # Sessions carry the role and active flag, new ones must pick up the change
+    if user_in.model_fields_set & {"password", "is_active", "is_superuser"}:
+        await revoke_refresh_tokens(db, user_id)
     return updated_user
 
 
-@router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
+@router.delete(
+    "/{user_id}",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=UserDeleted,
+)
 async def delete_user(
-    db: DbDep, current_user: CurrentUser, user_id: PyObjectId
-) -> Message:
+    db: DbDep,
+    current_user: CurrentPrincipal,
+    user_id: PyObjectId,
+    background_tasks: BackgroundTasks,
+) -> Any:
     """
-    Delete a user.
+    Delete a user. Owned items are removed by a background job.
     """
     user = await User.find_one(db, {"_id": user_id})
     if not user:
@@ -247,7 +402,14 @@ async def delete_user(
             detail="Super users are not allowed to delete themselves",
         )
 
-    # Delete all items owned by this user
+    # The job is recorded before the user goes, so a crash cannot orphan items,
+    # and only released once the user is gone
+    job = await enqueue_user_deletion(db, user.id)
     await user.delete(db)
-    Item.delete_many(db=db, query={"owner_id": user_id})
-    return Message(message="User deleted successfully")
+    await release_user_deletion(db, job)
+    invalidate_principal(user_id)
+    await revoke_refresh_tokens(db, user.id)
+    # Cached bodies of the user's items go with them
+    response_cache.clear()
+    background_tasks.add_task(run_deletion_jobs, db)
+    return UserDeleted(message="User deleted successfully", job_id=job.id)
@@ -1,8 +1,8 @@
 from fastapi import APIRouter, Depends, status
 from pydantic.networks import EmailStr
-from app.api.deps import get_current_active_superuser
+from app.api.deps import DbDep, get_current_active_superuser
 from app.models import Message
-from app.utils import generate_test_email, send_email
+from app.utils import generate_test_email, send_email_async
 
 router = APIRouter(prefix="/utils", tags=["utils"])
 
@@ -12,12 +12,13 @@ router = APIRouter(prefix="/utils", tags=["utils"])
     dependencies=[Depends(get_current_active_superuser)],
     status_code=status.HTTP_201_CREATED,
 )
-def test_email(email_to: EmailStr) -> Message:
+async def test_email(email_to: EmailStr, db: DbDep) -> Message:
     """
     Test emails.
     """
     email_data = generate_test_email(email_to=email_to)
-    send_email(
+    await send_email_async(
+        db=db,
         email_to=email_to,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -0,0 +1,76 @@
+import logging
+import re
+import time
+from typing import Any, Sequence
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Relevance order for $text queries, see ItemBase/UserBase text indexes
+TEXT_SCORE_SORT = [("score", {"$meta": "textScore"})]
+
+SEARCH_NOT_PAGEABLE = "Cursor pagination is not available for text search results"
+
+# Collections seen with a text index. A missing index is looked up again once
+# TEXT_INDEX_RECHECK_SECONDS have passed, so one created later is picked up
+# without a restart
+TEXT_INDEX_RECHECK_SECONDS = 60.0
+_text_indexed: set[str] = set()
+# Monotonic time of the last lookup that found no text index, per collection
+_text_index_missing: dict[str, float] = {}
+
+
+async def has_text_index(collection: AsyncIOMotorCollection) -> bool:
+    name = collection.name
+    if name in _text_indexed:
+        return True
+    checked_at = _text_index_missing.get(name)
+    if checked_at is not None:
+        if time.monotonic() - checked_at < TEXT_INDEX_RECHECK_SECONDS:
+            return False
+
+    indexes = await collection.index_information()
+    if any(kind == "text" for index in indexes.values() for _, kind in index["key"]):
+        _text_indexed.add(name)
+        _text_index_missing.pop(name, None)
+        return True
+
+    _text_index_missing[name] = time.monotonic()
+    logger.warning(
+        f"No text index on {name}, searching by regex for the next "
+        f"{TEXT_INDEX_RECHECK_SECONDS:g}s"
+    )
+    return False
+
+
+async def search_filter(
+    q: str, *, fields: Sequence[str], collection: AsyncIOMotorCollection
+) -> dict[str, Any]:
+    """
+    Filter matching `q` against `fields` of `collection`.
+
+    The "text" backend uses the collection's text index. The "regex" backend
+    is a fallback for deployments without one (and for mongomock, which has
+    no $text support); the input is escaped so it is matched literally.
+    The "text" backend falls back to it while the text index does not exist
+    yet, $text would fail without one.
+    """
+    if settings.SEARCH_BACKEND == "text":
+        if await has_text_index(collection):
+            return {"$text": {"$search": q}}
+
+    pattern = re.escape(q)
+    return {"$or": [{field: {"$regex": pattern, "$options": "i"}} for field in fields]}
+
+
+def email_prefix_filter(q: str) -> dict[str, Any] | None:
+    """
+    Anchored prefix match on email, served by the unique email index.
+
+    Only used when `q` looks like an email; emails are stored lowercased so
+    the case-sensitive anchored regex stays index-bounded.
+    """
+    if "@" not in q:
+        return None
+    return {"email": {"$regex": f"^{re.escape(q.strip().lower())}"}}
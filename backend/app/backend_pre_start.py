@@ -1,29 +1,17 @@
 import logging
-from tenacity import after_log, before_log, retry, stop_after_attempt, wait_fixed
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.core.config import settings
+from app.core.db import close_mongo_connection, connect_to_mongo
+from app.core.startup import wait_for_mongo
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-max_tries = 60 * 5  # 5 minutes
-wait_seconds = 1
 
-
-@retry(
-    stop=stop_after_attempt(max_tries),
-    wait=wait_fixed(wait_seconds),
-    before=before_log(logger, logging.INFO),
-    after=after_log(logger, logging.WARN),
-)
 async def init() -> None:
+    # Pings with exponential backoff for up to MONGODB_PING_TIMEOUT_SECONDS
     try:
-        client = AsyncIOMotorClient(settings.MONGODB_URI)
-        # Ping the database to check if connection is working
-        await client.admin.command("ping")
-    except Exception as e:
-        logger.error(e)
-        raise e
+        await wait_for_mongo(connect_to_mongo().get_client())
+    finally:
+        close_mongo_connection()
 
 
 async def main() -> None:
@@ -0,0 +1,293 @@
+"""
+Throughput and latency of the API hot paths, driven in-process over ASGI.
+
+    python -m app.benchmarks.api [--backend mock|mongod] [--requests N]
+        [--concurrency C] [--items N] [--output results.json]
+
+The mock backend runs against mongomock (app.tests.mongo_client.MongoHandler)
+and mostly measures the application's own overhead. The mongod backend uses
+MONGODB_URI with a throwaway database that is dropped afterwards.
+
+Each scenario prints one JSON object with req/s and p50/p95/p99 latency in
+milliseconds; --output writes the whole run as one JSON document.
+"""
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from typing import Any
+from unittest.mock import patch
+import httpx
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.api.deps import get_db
+from app.core.config import settings
+from app.core.security import get_password_hash
+from app.main import app
+from app.models import Item, User
+from app.tests.mongo_client import MongoHandler
+
+API = settings.API_V1_STR
+BENCH_USER_EMAIL = "bench@example.com"
+BENCH_USER_PASSWORD = "benchmark-password"
+
+Request = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class Result:
+    scenario: str
+    requests: int
+    concurrency: int
+    errors: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    name: str,
+    request: Request,
+    *,
+    requests: int,
+    concurrency: int,
+) -> Result:
+    """Issue `requests` calls of `request`, at most `concurrency` at a time."""
+    latencies: list[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await request(client, i)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+
+    cuts = statistics.quantiles(latencies, n=100) if len(latencies) > 1 else []
+    percentile = {
+        p: round((cuts[p - 1] if cuts else latencies[0]) * 1000, 3)
+        for p in (50, 95, 99)
+    }
+    return Result(
+        scenario=name,
+        requests=requests,
+        concurrency=concurrency,
+        errors=errors,
+        rps=round(requests / elapsed, 1),
+        p50_ms=percentile[50],
+        p95_ms=percentile[95],
+        p99_ms=percentile[99],
+    )
+
+
+async def seed(db: Any, items: int) -> tuple[str, list[str]]:
+    """Create the benchmark user and `items` items owned by it."""
+    user = await User(
+        email=BENCH_USER_EMAIL,
+        full_name="Benchmark User",
+        hashed_password=get_password_hash(BENCH_USER_PASSWORD),
+    ).save(db)
+
+    docs = [
+        Item(
+            title=f"Benchmark item {i}",
+            description=f"Seeded item number {i}",
+            owner_id=user.id,
+        ).model_dump(exclude={"id"})
+        for i in range(items)
+    ]
+    result = await Item.get_collection(db).insert_many(docs)
+    return user.id, [str(id) for id in result.inserted_ids]
+
+
+async def login(client: httpx.AsyncClient) -> dict[str, str]:
+    response = await client.post(
+        f"{API}/login/access-token",
+        data={"username": BENCH_USER_EMAIL, "password": BENCH_USER_PASSWORD},
+    )
+    response.raise_for_status()
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def deep_cursor(
+    client: httpx.AsyncClient, headers: dict[str, str], depth: int
+) -> str | None:
+    """next_cursor pointing `depth` rows into the item list."""
+    response = await client.get(
+        f"{API}/items/",
+        headers=headers,
+        params={"limit": depth, "count": "none"},
+    )
+    return response.json()["next_cursor"]
+
+
+async def run(args: argparse.Namespace) -> list[Result]:
+    if args.backend == "mock":
+        db: Any = MongoHandler("benchmark", "items")
+    else:
+        mongo_client = AsyncIOMotorClient(settings.MONGODB_URI)
+        db = mongo_client[f"benchmark_{ObjectId()}"]
+
+    async def override_get_db() -> Any:
+        yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    _, item_ids = await seed(db, args.items)
+
+    transport = httpx.ASGITransport(app=app)
+    results = []
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        headers = await login(client)
+        depth = min(args.items // 2, 1000)
+        cursor = await deep_cursor(client, headers, depth)
+
+        # Items created by item_create are the ones item_delete removes
+        created: list[str] = []
+
+        async def create(c: httpx.AsyncClient, i: int) -> httpx.Response:
+            response = await c.post(
+                f"{API}/items/", headers=headers, json={"title": f"Created {i}"}
+            )
+            created.append(response.json()["id"])
+            return response
+
+        scenarios: list[tuple[str, Request]] = [
+            (
+                "login",
+                lambda c, _: c.post(
+                    f"{API}/login/access-token",
+                    data={
+                        "username": BENCH_USER_EMAIL,
+                        "password": BENCH_USER_PASSWORD,
+                    },
+                ),
+            ),
+            (
+                "get_current_user",
+                lambda c, _: c.get(f"{API}/users/me", headers=headers),
+            ),
+            *[
+                (
+                    f"items_list_limit_{limit}",
+                    lambda c, _, limit=limit: c.get(
+                        f"{API}/items/", headers=headers, params={"limit": limit}
+                    ),
+                )
+                for limit in (10, 100, 1000)
+            ],
+            (
+                f"items_list_skip_{depth}",
+                lambda c, _: c.get(
+                    f"{API}/items/",
+                    headers=headers,
+                    params={"skip": depth, "limit": 100},
+                ),
+            ),
+            (
+                f"items_list_cursor_{depth}",
+                lambda c, _: c.get(
+                    f"{API}/items/",
+                    headers=headers,
+                    params={"after": cursor, "limit": 100},
+                ),
+            ),
+            (
+                "items_search_q",
+                lambda c, _: c.get(
+                    f"{API}/items/",
+                    headers=headers,
+                    params={"q": "number 42", "limit": 100},
+                ),
+            ),
+            ("item_create", create),
+            (
+                "item_update",
+                lambda c, i: c.put(
+                    f"{API}/items/{item_ids[i % len(item_ids)]}",
+                    headers=headers,
+                    json={"title": f"Updated {i}"},
+                ),
+            ),
+            (
+                "item_delete",
+                lambda c, i: c.delete(f"{API}/items/{created[i]}", headers=headers),
+            ),
+        ]
+
+        for name, request in scenarios:
+            if args.only and name not in args.only:
+                continue
+            # bcrypt dominates login, a smaller sample is enough
+            requests = args.requests if name != "login" else max(args.requests // 10, 2)
+            if name == "item_delete":
+                # Needs item_create to have run first
+                requests = min(requests, len(created))
+                if not requests:
+                    continue
+            result = await run_scenario(
+                client,
+                name,
+                request,
+                requests=requests,
+                concurrency=args.concurrency,
+            )
+            print(json.dumps(asdict(result)), flush=True)
+            results.append(result)
+
+    app.dependency_overrides.clear()
+    if args.backend == "mock":
+        await db.drop_database()
+    else:
+        await mongo_client.drop_database(db.name)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--backend", choices=("mock", "mongod"), default="mock")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--only", nargs="*", help="Scenario names to run")
+    parser.add_argument("--output", help="Write the whole run to this JSON file")
+    args = parser.parse_args()
+
+    # mongomock has no $text, search through the regex backend there
+    backend = "regex" if args.backend == "mock" else settings.SEARCH_BACKEND
+    # Every login comes from one client and email, the limiter would reject most
+    with (
+        patch.object(settings, "SEARCH_BACKEND", backend),
+        patch.object(settings, "RATE_LIMIT_BACKEND", "off"),
+    ):
+        results = asyncio.run(run(args))
+
+    if args.output:
+        report = {
+            "backend": args.backend,
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "results": [asdict(result) for result in results],
+        }
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
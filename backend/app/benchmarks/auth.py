@@ -0,0 +1,57 @@
+"""
+Per-request cost of resolving the bearer token in deps.get_current_user,
+with and without the decoded-token cache.
+
+    python -m app.benchmarks.auth [--iterations N]
+"""
+
+import argparse
+import json
+import timeit
+from datetime import timedelta
+import jwt
+from app.core import security
+from app.core.cache import token_cache
+from app.core.config import settings
+from app.models import TokenPayload
+
+
+def decode_uncached(token: str) -> TokenPayload:
+    # What get_current_user did before the cache: verify and parse every request
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[security.ALGORITHM])
+    return TokenPayload(**payload)
+
+
+def run(iterations: int) -> list[dict[str, float | int | str]]:
+    token = security.create_access_token(
+        "5f5f5f5f5f5f5f5f5f5f5f5f", timedelta(minutes=30)
+    )
+    token_cache.clear()
+    security.decode_access_token(token)
+
+    results = []
+    for name, func in [
+        ("uncached", decode_uncached),
+        ("cached", security.decode_access_token),
+    ]:
+        seconds = min(timeit.repeat(lambda: func(token), number=iterations, repeat=5))
+        results.append(
+            {
+                "case": name,
+                "iterations": iterations,
+                "us_per_request": round(seconds / iterations * 1e6, 3),
+            }
+        )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    for result in run(args.iterations):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Per-request cost of MetricsMiddleware and per-command cost of the pymongo
+listeners, measured on a bare FastAPI app driven directly over ASGI.
+
+    python -m app.benchmarks.metrics [--iterations N]
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from datetime import timedelta
+from typing import Any
+from fastapi import FastAPI
+from pymongo import monitoring
+from app.core.metrics import CommandMetrics, MetricsMiddleware
+from app.main import custom_generate_unique_id
+
+
+def build_app(instrumented: bool) -> Any:
+    app = FastAPI()
+
+    @app.get("/ping", tags=["bench"])
+    async def ping() -> dict[str, str]:
+        return {"ping": "pong"}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, route_id=custom_generate_unique_id)
+    return app
+
+
+async def request_seconds(app: Any, iterations: int) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/ping",
+        "raw_path": b"/ping",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [],
+        "server": ("bench", 80),
+    }
+
+    async def receive() -> dict[str, Any]:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(_message: dict[str, Any]) -> None:
+        pass
+
+    # Warm up routing and the middleware's label cache
+    await app(dict(scope), receive, send)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await app(dict(scope), receive, send)
+    return time.perf_counter() - start
+
+
+def listener_seconds(iterations: int) -> float:
+    listener = CommandMetrics()
+    address = ("localhost", 27017)
+    command = {"find": "items", "filter": {}}
+    duration = timedelta(microseconds=500)
+    start = time.perf_counter()
+    for request_id in range(iterations):
+        listener.started(
+            monitoring.CommandStartedEvent(command, "app", request_id, address, 1)
+        )
+        listener.succeeded(
+            monitoring.CommandSucceededEvent(
+                duration, {"ok": 1}, "find", request_id, address, 1
+            )
+        )
+    return time.perf_counter() - start
+
+
+def run(iterations: int) -> list[dict[str, float | int | str]]:
+    plain = asyncio.run(request_seconds(build_app(False), iterations))
+    instrumented = asyncio.run(request_seconds(build_app(True), iterations))
+    listener = listener_seconds(iterations)
+    cases = [
+        ("request_plain", plain),
+        ("request_instrumented", instrumented),
+        ("middleware_overhead", instrumented - plain),
+        ("mongo_command_listener", listener),
+    ]
+    return [
+        {
+            "case": name,
+            "iterations": iterations,
+            "us_per_op": round(seconds / iterations * 1e6, 3),
+        }
+        for name, seconds in cases
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+    for result in run(args.iterations):
+        print(json.dumps(result))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Generic, Hashable, TypeVar
+from app.core.config import settings
+from app.models import TokenPayload, User
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded, in-process LRU cache whose entries expire after `ttl` seconds.
+
+    Not shared between workers, so anything cached here must tolerate being
+    stale for up to `ttl` seconds on workers that did not see the write.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V, *, ttl: float | None = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data)}
+
+
+# Validated User principals keyed by user id, see deps.get_current_user
+principal_cache: TTLCache[str, User] = TTLCache(
+    maxsize=settings.PRINCIPAL_CACHE_SIZE, ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS
+)
+
+
+# Decoded access-token claims keyed by the token, each kept until the token's exp
+token_cache: TTLCache[str, TokenPayload] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+)
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    etag: str
+    body: bytes
+
+
+# Single-resource response bodies keyed by resource ("items:<id>"), then by
+# the id of the principal they were authorized for, see app.api.conditional
+response_cache: TTLCache[str, dict[str, CachedResponse]] = TTLCache(
+    maxsize=settings.RESPONSE_CACHE_SIZE, ttl=settings.RESPONSE_CACHE_TTL_SECONDS
+)
+
+
+def invalidate_response(resource: str) -> None:
+    """Drop every principal's cached response for `resource`."""
+    response_cache.pop(resource)
+
+
+def invalidate_principal(user_id: object) -> None:
+    """Drop a cached principal after a write that changes the user."""
+    principal_cache.pop(str(user_id))
+    invalidate_response(f"users:{user_id}")
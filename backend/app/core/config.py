@@ -29,8 +29,14 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
-    # 60 minutes * 24 hours * 8 days = 8 days
+    # Routes authorize from the role and active claims of access tokens issued
+    # in the last ACCESS_TOKEN_CLAIMS_TTL_MINUTES, so a change to a user reaches
+    # them within that window; older tokens are checked against the user.
+    # Clients that rotate refresh tokens (app.core.refresh_tokens) can lower
+    # the expiry to the claims TTL, the bundled frontend does not yet
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    ACCESS_TOKEN_CLAIMS_TTL_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 8
     FRONTEND_HOST: str = "http://localhost:3001"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -48,7 +54,15 @@ class Settings(BaseSettings):
     PROJECT_NAME: str
     SENTRY_DSN: HttpUrl | None = None
     MONGODB_DB_NAME: str = ""
-    MONGODB_URI: str = ""
+    MONGODB_URI: str = "mongodb://localhost:27017"
+    MONGODB_MAX_POOL_SIZE: int = 100
+    MONGODB_MIN_POOL_SIZE: int = 10
+    MONGODB_MAX_IDLE_TIME_MS: int = 30_000
+    MONGODB_WAIT_QUEUE_TIMEOUT_MS: int = 10_000
+    # Each worker pings MongoDB, creates the models' indexes and seeds
+    # FIRST_SUPERUSER before serving, see app.core.startup
+    STARTUP_INIT_DB: bool = True
+    MONGODB_PING_TIMEOUT_SECONDS: float = 300.0
 
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
@@ -67,6 +81,70 @@ class Settings(BaseSettings):
 
     EMAIL_RESET_TOKEN_EXPIRE_HOURS: int = 48
 
+    # Outbox delivery, see app.core.email_outbox
+    EMAIL_BATCH_SIZE: int = 50
+    EMAIL_POLL_INTERVAL_SECONDS: float = 5.0
+    EMAIL_MAX_ATTEMPTS: int = 5
+    EMAIL_RETRY_BACKOFF_SECONDS: float = 30.0
+    EMAIL_CLAIM_TIMEOUT_SECONDS: float = 300.0
+
+    # bcrypt runs in a bounded thread pool; requests beyond the queue get a 503
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+    # bcrypt cost of new hashes, stored hashes at another cost are rehashed on
+    # the next login. With a target set, each worker instead picks the cost at
+    # startup so a verify takes about that long, never below the minimum
+    BCRYPT_ROUNDS: int = 12
+    BCRYPT_TARGET_VERIFY_MS: float | None = None
+    BCRYPT_MIN_ROUNDS: int = 10
+
+    # Token buckets in front of login and password recovery, see
+    # app.core.rate_limit. "mongo" shares them between workers, "memory" keeps
+    # them per worker
+    RATE_LIMIT_BACKEND: Literal["off", "memory", "mongo"] = "mongo"
+    RATE_LIMIT_IP_BURST: int = 20
+    RATE_LIMIT_IP_PER_MINUTE: float = 10.0
+    RATE_LIMIT_EMAIL_BURST: int = 5
+    RATE_LIMIT_EMAIL_PER_MINUTE: float = 1.0
+    RATE_LIMIT_MEMORY_SIZE: int = 10_000
+
+    # Authenticated principals are cached per worker; set the TTL to 0 to disable
+    PRINCIPAL_CACHE_SIZE: int = 1024
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 10.0
+    TOKEN_CACHE_SIZE: int = 4096
+
+    # Serialized GET /items/{id} and /users/... bodies, cached per principal and
+    # dropped by the routes that change them; other workers may serve a stale
+    # body for up to the TTL. Off (0) by default
+    RESPONSE_CACHE_SIZE: int = 4096
+    RESPONSE_CACHE_TTL_SECONDS: float = 0.0
+
+    # Totals served to list endpoints called with count=cached
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL_SECONDS: float = 30.0
+
+    # "text" uses the collections' text indexes, "regex" an escaped
+    # case-insensitive match for deployments or test doubles without $text
+    SEARCH_BACKEND: Literal["text", "regex"] = "text"
+
+    # Explain the hot query shapes at startup, see app.index_audit
+    INDEX_AUDIT: Literal["off", "warn", "fail"] = "off"
+
+    # Rows validated and written per insert_many by the bulk endpoints
+    BULK_CHUNK_SIZE: int = 1000
+    BULK_MAX_CHUNK_SIZE: int = 10000
+
+    # Cursor batch size of the export endpoints, also the rows per streamed chunk
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # Prometheus metrics served at /metrics, see app.core.metrics
+    METRICS_ENABLED: bool = True
+
+    # Cascade deletes of removed users' items, see app.core.deletion_jobs
+    DELETION_BATCH_SIZE: int = 1000
+    DELETION_JOB_CLAIM_TIMEOUT_SECONDS: int = 300
+    DELETION_JOB_POLL_INTERVAL_SECONDS: int = 60
+
     @computed_field  # type: ignore[prop-decorator]
     @property
     def emails_enabled(self) -> bool:
@@ -1,12 +1,47 @@
+import logging
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import DuplicateKeyError
+from pymongo_orm import AsyncMongoConnection
 from app import crud
 from app.core.config import settings
+from app.core.metrics import event_listeners
 from app.models import UserCreate, User
 
+logger = logging.getLogger(__name__)
+
+_connection: AsyncMongoConnection | None = None
+
+
+def connect_to_mongo() -> AsyncMongoConnection:
+    """Create the worker-wide pooled client, reusing it if it already exists."""
+    global _connection
+    if _connection is None:
+        _connection = AsyncMongoConnection(
+            settings.MONGODB_URI,
+            maxPoolSize=settings.MONGODB_MAX_POOL_SIZE,
+            minPoolSize=settings.MONGODB_MIN_POOL_SIZE,
+            maxIdleTimeMS=settings.MONGODB_MAX_IDLE_TIME_MS,
+            waitQueueTimeoutMS=settings.MONGODB_WAIT_QUEUE_TIMEOUT_MS,
+            event_listeners=event_listeners() if settings.METRICS_ENABLED else [],
+        )
+    return _connection
+
+
+def close_mongo_connection() -> None:
+    """Close the pooled client, releasing every socket it holds."""
+    global _connection
+    if _connection is not None:
+        _connection.close()
+        _connection = None
+
+
+def get_database() -> AsyncIOMotorDatabase:
+    return connect_to_mongo().get_db(db_name=settings.MONGODB_DB_NAME)
+
 
 async def init_db(db: AsyncIOMotorDatabase) -> None:
     # Check if superuser exists
-    user = await User.find_by_email(db, settings.FIRST_SUPERUSER)
+    user = await User.find_by_email(db=db, email=settings.FIRST_SUPERUSER)
 
     if not user:
         user_in = UserCreate(
@@ -15,4 +50,8 @@ async def init_db(db: AsyncIOMotorDatabase) -> None:
             is_superuser=True,
         )
 
-        await crud.create_user(db=db, user_create=user_in)
+        try:
+            await crud.create_user(db=db, user_create=user_in)
+        except DuplicateKeyError:
+            # Every worker seeds at startup, another one got there first
+            logger.info("First superuser already created")
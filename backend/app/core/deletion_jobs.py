@@ -0,0 +1,156 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from pymongo_orm.utils.converters import doc_to_model
+from app.core.config import settings
+from app.core.db import get_database
+from app.models import DeletionJob, Item, User
+
+logger = logging.getLogger(__name__)
+
+
+async def enqueue_user_deletion(db: AsyncIOMotorDatabase, user_id: str) -> DeletionJob:
+    """
+    Record the cascade delete job of `user_id`, or return the existing one.
+    The job is not claimed until release_user_deletion, called once the user
+    is removed.
+    """
+    # A job cancelled after an earlier, failed removal of this user is reused
+    await DeletionJob.get_collection(db).update_one(
+        {"user_id": user_id, "status": "cancelled"},
+        {"$set": {"status": "created", "finished_at": None}},
+    )
+    defaults = DeletionJob(user_id=user_id).model_dump(exclude={"id", "user_id"})
+    doc = await DeletionJob.get_collection(db).find_one_and_update(
+        {"user_id": user_id},
+        {"$setOnInsert": defaults},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc_to_model(doc, DeletionJob)
+
+
+async def release_user_deletion(db: AsyncIOMotorDatabase, job: DeletionJob) -> None:
+    """Make the job claimable, its user is gone."""
+    await DeletionJob.get_collection(db).update_one(
+        {"_id": ObjectId(job.id), "status": "created"},
+        {"$set": {"status": "pending"}},
+    )
+
+
+async def _claim(db: AsyncIOMotorDatabase) -> DeletionJob | None:
+    # Running jobs whose heartbeat stopped belong to a worker that died, and
+    # created jobs never released belong to a request that died; run_deletion_job
+    # finds out whether their user was removed
+    now = datetime.utcnow()
+    stale = now - timedelta(seconds=settings.DELETION_JOB_CLAIM_TIMEOUT_SECONDS)
+    doc = await DeletionJob.get_collection(db).find_one_and_update(
+        {
+            "$or": [
+                {"status": "pending"},
+                {"status": "running", "claimed_at": {"$lte": stale}},
+                {"status": "created", "created_at": {"$lte": stale}},
+            ]
+        },
+        {"$set": {"status": "running", "claimed_at": now}},
+        sort=[("created_at", ASCENDING)],
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc_to_model(doc, DeletionJob) if doc else None
+
+
+async def run_deletion_job(db: AsyncIOMotorDatabase, job: DeletionJob) -> None:
+    """
+    Delete the job's items in DELETION_BATCH_SIZE ranges of `_id`, recording
+    each finished range so an interrupted job continues where it stopped.
+    Re-running a range deletes nothing, which keeps resumption idempotent.
+
+    If the job's user still exists, its removal failed, and the job is
+    cancelled without deleting anything.
+    """
+    items = Item.get_collection(db)
+    jobs = DeletionJob.get_collection(db)
+    if await User.get_collection(db).count_documents(
+        {"_id": ObjectId(job.user_id)}, limit=1
+    ):
+        logger.warning(f"User {job.user_id} still exists, cancelling deletion job")
+        await jobs.update_one(
+            {"_id": ObjectId(job.id)},
+            {"$set": {"status": "cancelled", "finished_at": datetime.utcnow()}},
+        )
+        return
+    last_id = ObjectId(job.last_id) if job.last_id else None
+
+    while True:
+        query = {"owner_id": job.user_id}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        batch = await items.find(
+            query,
+            {"_id": 1},
+            sort=[("_id", ASCENDING)],
+            limit=settings.DELETION_BATCH_SIZE,
+        ).to_list(length=None)
+        if not batch:
+            break
+
+        last_id = batch[-1]["_id"]
+        result = await items.delete_many(
+            {
+                "owner_id": job.user_id,
+                "_id": {"$gte": batch[0]["_id"], "$lte": last_id},
+            }
+        )
+        await jobs.update_one(
+            {"_id": ObjectId(job.id)},
+            {
+                "$inc": {"deleted_items": result.deleted_count},
+                "$set": {"last_id": str(last_id), "claimed_at": datetime.utcnow()},
+            },
+        )
+
+    await jobs.update_one(
+        {"_id": ObjectId(job.id)},
+        {"$set": {"status": "done", "finished_at": datetime.utcnow()}},
+    )
+
+
+async def run_deletion_jobs(db: AsyncIOMotorDatabase) -> int:
+    """Run claimable jobs until none is left, returning how many ran."""
+    count = 0
+    while (job := await _claim(db)) is not None:
+        await run_deletion_job(db, job)
+        count += 1
+    return count
+
+
+_worker: asyncio.Task[None] | None = None
+
+
+async def _poll() -> None:
+    # Picks up jobs left behind by a crashed or restarted worker
+    while True:
+        try:
+            await run_deletion_jobs(get_database())
+        except Exception:
+            logger.exception("Cascade deletion run failed")
+        await asyncio.sleep(settings.DELETION_JOB_POLL_INTERVAL_SECONDS)
+
+
+def start_deletion_worker() -> None:
+    global _worker
+    _worker = asyncio.create_task(_poll())
+
+
+async def stop_deletion_worker() -> None:
+    global _worker
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
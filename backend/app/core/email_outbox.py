@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Any
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, ReturnDocument
+from app.core.config import settings
+from app.core.metrics import EMAIL_SEND_DURATION
+from app.models import EmailOutbox
+
+if TYPE_CHECKING:
+    from emails.backend.smtp import SMTPBackend  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Sent and failed messages are kept this long, without their body
+OUTBOX_RETENTION = timedelta(days=7)
+
+
+def smtp_options() -> dict[str, Any]:
+    options: dict[str, Any] = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
+    if settings.SMTP_TLS:
+        options["tls"] = True
+    elif settings.SMTP_SSL:
+        options["ssl"] = True
+    if settings.SMTP_USER:
+        options["user"] = settings.SMTP_USER
+    if settings.SMTP_PASSWORD:
+        options["password"] = settings.SMTP_PASSWORD
+    return options
+
+
+class EmailDispatcher:
+    """
+    Background task draining the email outbox in batches over a single,
+    reused SMTP connection. Failed deliveries are retried with exponential
+    backoff up to EMAIL_MAX_ATTEMPTS.
+
+    Every worker runs one; messages are claimed atomically so each is sent
+    once, and claims older than EMAIL_CLAIM_TIMEOUT_SECONDS (a worker that
+    died mid-send) are picked up again.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.db = db
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        # smtplib blocks and its connection is not thread-safe, one thread owns it
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="smtp")
+        self._backend: "SMTPBackend | None" = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._close_connection)
+        self._executor.shutdown()
+
+    def wakeup(self) -> None:
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                sent = await self.dispatch_batch()
+            except Exception:
+                logger.exception("Email outbox dispatch failed")
+                sent = 0
+
+            # A full batch means there may be more due, otherwise wait for new mail
+            if sent < settings.EMAIL_BATCH_SIZE:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(),
+                        timeout=settings.EMAIL_POLL_INTERVAL_SECONDS,
+                    )
+                except asyncio.TimeoutError:
+                    pass
+
+    async def dispatch_batch(self) -> int:
+        """Claim up to EMAIL_BATCH_SIZE due messages and deliver them."""
+        messages = []
+        while len(messages) < settings.EMAIL_BATCH_SIZE:
+            message = await self._claim()
+            if message is None:
+                break
+            messages.append(message)
+
+        for message in messages:
+            await self._deliver(message)
+        return len(messages)
+
+    async def _claim(self) -> EmailOutbox | None:
+        now = datetime.utcnow()
+        stale = now - timedelta(seconds=settings.EMAIL_CLAIM_TIMEOUT_SECONDS)
+        doc = await EmailOutbox.get_collection(self.db).find_one_and_update(
+            {
+                "$or": [
+                    {"status": "pending", "next_attempt_at": {"$lte": now}},
+                    {"status": "sending", "claimed_at": {"$lte": stale}},
+                ]
+            },
+            {"$set": {"status": "sending", "claimed_at": now}},
+            sort=[("next_attempt_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc is None:
+            return None
+        doc["id"] = str(doc.pop("_id"))
+        return EmailOutbox(**doc)
+
+    async def _deliver(self, message: EmailOutbox) -> None:
+        collection = EmailOutbox.get_collection(self.db)
+        loop = asyncio.get_running_loop()
+        try:
+            await loop.run_in_executor(self._executor, self._send, message)
+        except Exception as e:
+            attempts = message.attempts + 1
+            update: dict[str, Any] = {"attempts": attempts, "last_error": str(e)}
+            if attempts >= settings.EMAIL_MAX_ATTEMPTS:
+                logger.error(f"Giving up on email {message.id} to {message.email_to}")
+                await self._finish(message, {"status": "failed", **update})
+                return
+
+            backoff = settings.EMAIL_RETRY_BACKOFF_SECONDS * 2 ** (attempts - 1)
+            update["status"] = "pending"
+            update["next_attempt_at"] = datetime.utcnow() + timedelta(seconds=backoff)
+            await collection.update_one({"_id": ObjectId(message.id)}, {"$set": update})
+            return
+
+        await self._finish(message, {"status": "sent", "sent_at": datetime.utcnow()})
+
+    async def _finish(self, message: EmailOutbox, update: dict[str, Any]) -> None:
+        """
+        Record a final status, dropping the body: it may hold a password or
+        a live reset link. The row itself expires after OUTBOX_RETENTION.
+        """
+        update["purge_at"] = datetime.utcnow() + OUTBOX_RETENTION
+        await EmailOutbox.get_collection(self.db).update_one(
+            {"_id": ObjectId(message.id)},
+            {"$set": update, "$unset": {"html_content": ""}},
+        )
+
+    def _send(self, message: EmailOutbox) -> None:
+        # Imported here, workers without SMTP configured never load them
+        import emails  # type: ignore
+        from emails.backend.smtp import SMTPBackend  # type: ignore
+
+        if self._backend is None:
+            self._backend = SMTPBackend(fail_silently=False, **smtp_options())
+        with EMAIL_SEND_DURATION.time():
+            response = emails.Message(
+                subject=message.subject,
+                html=message.html_content,
+                mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+            ).send(to=message.email_to, smtp=self._backend)
+        logger.info(f"send email result: {response}")
+
+    def _close_connection(self) -> None:
+        if self._backend is not None:
+            self._backend.close()
+            self._backend = None
+
+
+_dispatcher: EmailDispatcher | None = None
+
+
+def start_email_dispatcher(db: AsyncIOMotorDatabase) -> None:
+    global _dispatcher
+    _dispatcher = EmailDispatcher(db)
+    _dispatcher.start()
+
+
+async def stop_email_dispatcher() -> None:
+    global _dispatcher
+    if _dispatcher is not None:
+        await _dispatcher.stop()
+        _dispatcher = None
+
+
+async def enqueue_email(
+    db: AsyncIOMotorDatabase, *, email_to: str, subject: str, html_content: str
+) -> EmailOutbox:
+    message = await EmailOutbox(
+        email_to=email_to, subject=subject, html_content=html_content
+    ).save(db)
+    if _dispatcher is not None:
+        _dispatcher.wakeup()
+    return message
@@ -0,0 +1,222 @@
+import time
+from typing import Any, Callable, Iterator, Protocol
+from fastapi.routing import APIRoute
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Gauge,
+    Histogram,
+    Summary,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from pymongo import monitoring
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+# Labels only ever take values from a fixed set (route ids, collection and
+# command names), so the number of series stays bounded
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route id",
+    ["route", "method", "status"],
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served"
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds",
+    "MongoDB command latency",
+    ["collection", "command"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongodb_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled MongoDB connection",
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0),
+)
+PASSWORD_HASH_DURATION = Summary(
+    "password_hash_duration_seconds",
+    "Time spent in bcrypt, by operation",
+    ["operation"],
+)
+PASSWORD_HASH_QUEUE_DEPTH = Gauge(
+    "password_hash_queue_depth", "Hash and verify calls queued or running"
+)
+EMAIL_SEND_DURATION = Summary(
+    "email_send_duration_seconds", "Time spent handing emails to the SMTP server"
+)
+
+STARTUP_PHASE_DURATION = Gauge(
+    "app_startup_phase_seconds", "Duration of each startup phase", ["phase"]
+)
+
+UNMATCHED_ROUTE = "unmatched"
+HTTP_METHODS = frozenset(
+    {"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS", "TRACE"}
+)
+
+
+class MetricsMiddleware:
+    """
+    Records REQUEST_DURATION and REQUESTS_IN_FLIGHT.
+
+    Plain ASGI rather than BaseHTTPMiddleware, so the cost per request is two
+    clock reads and three metric updates, see app.benchmarks.metrics.
+    API routes are labelled with `route_id`, the app's operation id function.
+    """
+
+    def __init__(self, app: ASGIApp, route_id: Callable[[APIRoute], str]) -> None:
+        self.app = app
+        self.route_id = route_id
+        # Keyed by id(), routes are unhashable and live as long as the app
+        self._labels: dict[int, str] = {}
+        # Labelled histogram children, labels() is comparatively slow
+        self._observers: dict[tuple[str, str, int], Any] = {}
+
+    def _route_label(self, route: Any) -> str:
+        label = self._labels.get(id(route))
+        if label is None:
+            if isinstance(route, APIRoute):
+                label = self.route_id(route)
+            else:
+                label = getattr(route, "name", None) or UNMATCHED_ROUTE
+            self._labels[id(route)] = label
+        return label
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope
+            method = scope["method"]
+            if method not in HTTP_METHODS:
+                method = "OTHER"
+            key = (self._route_label(scope.get("route")), method, status_code)
+            observer = self._observers.get(key)
+            if observer is None:
+                observer = REQUEST_DURATION.labels(key[0], key[1], str(key[2]))
+                self._observers[key] = observer
+            observer.observe(time.perf_counter() - start)
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """Feeds MONGO_COMMAND_DURATION from pymongo command monitoring."""
+
+    def __init__(self) -> None:
+        # Collection of each command in flight, the reply events don't carry it
+        self._collections: dict[tuple[Any, int], str] = {}
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        collection = event.command.get(event.command_name)
+        if not isinstance(collection, str):
+            # getMore names its collection separately
+            collection = event.command.get("collection", "")
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        self._observe(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        self._observe(event)
+
+    def _observe(
+        self, event: monitoring.CommandSucceededEvent | monitoring.CommandFailedEvent
+    ) -> None:
+        key = (event.connection_id, event.request_id)
+        collection = self._collections.pop(key, "")
+        MONGO_COMMAND_DURATION.labels(collection, event.command_name).observe(
+            event.duration_micros / 1e6
+        )
+
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Feeds MONGO_POOL_CHECKOUT_WAIT from pymongo pool monitoring."""
+
+    def connection_checked_out(
+        self, event: monitoring.ConnectionCheckedOutEvent
+    ) -> None:
+        MONGO_POOL_CHECKOUT_WAIT.observe(event.duration)
+
+    def connection_check_out_failed(
+        self, event: monitoring.ConnectionCheckOutFailedEvent
+    ) -> None:
+        MONGO_POOL_CHECKOUT_WAIT.observe(event.duration)
+
+    def pool_created(self, event: monitoring.PoolCreatedEvent) -> None:
+        pass
+
+    def pool_ready(self, event: monitoring.PoolReadyEvent) -> None:
+        pass
+
+    def pool_cleared(self, event: monitoring.PoolClearedEvent) -> None:
+        pass
+
+    def pool_closed(self, event: monitoring.PoolClosedEvent) -> None:
+        pass
+
+    def connection_created(self, event: monitoring.ConnectionCreatedEvent) -> None:
+        pass
+
+    def connection_ready(self, event: monitoring.ConnectionReadyEvent) -> None:
+        pass
+
+    def connection_closed(self, event: monitoring.ConnectionClosedEvent) -> None:
+        pass
+
+    def connection_check_out_started(
+        self, event: monitoring.ConnectionCheckOutStartedEvent
+    ) -> None:
+        pass
+
+    def connection_checked_in(self, event: monitoring.ConnectionCheckedInEvent) -> None:
+        pass
+
+
+class StatsSource(Protocol):
+    def stats(self) -> dict[str, int]: ...
+
+
+class CacheStatsCollector(Collector):
+    """Exposes the hit, miss and size counters of the in-process caches."""
+
+    def __init__(self, caches: dict[str, StatsSource]) -> None:
+        self.caches = caches
+
+    def collect(self) -> Iterator[Any]:
+        hits = CounterMetricFamily("cache_hits", "Cache hits", labels=["cache"])
+        misses = CounterMetricFamily("cache_misses", "Cache misses", labels=["cache"])
+        size = GaugeMetricFamily("cache_size", "Cached entries", labels=["cache"])
+        for name, cache in self.caches.items():
+            stats = cache.stats()
+            hits.add_metric([name], stats["hits"])
+            misses.add_metric([name], stats["misses"])
+            size.add_metric([name], stats["size"])
+        yield from (hits, misses, size)
+
+
+def event_listeners() -> list[Any]:
+    """pymongo listeners to pass to the client as `event_listeners`."""
+    return [CommandMetrics(), PoolMetrics()]
+
+
+async def metrics_endpoint(_request: Request) -> Response:
+    """Prometheus text exposition of the default registry."""
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
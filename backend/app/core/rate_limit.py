@@ -0,0 +1,135 @@
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Protocol
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.models import RateLimitBucket
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """Up to `burst` requests at once, refilled at `per_minute`."""
+
+    burst: int
+    per_minute: float
+
+    @property
+    def rate(self) -> float:
+        """Tokens added per second."""
+        return self.per_minute / 60
+
+    @property
+    def refill_seconds(self) -> float:
+        """Time for an empty bucket to fill up again."""
+        return self.burst / self.rate
+
+
+def ip_bucket() -> Bucket:
+    return Bucket(settings.RATE_LIMIT_IP_BURST, settings.RATE_LIMIT_IP_PER_MINUTE)
+
+
+def email_bucket() -> Bucket:
+    return Bucket(settings.RATE_LIMIT_EMAIL_BURST, settings.RATE_LIMIT_EMAIL_PER_MINUTE)
+
+
+class RateLimiter(Protocol):
+    async def take(self, key: str, bucket: Bucket) -> float:
+        """
+        Take a token from the bucket `key`. Returns 0 when the request may
+        proceed, otherwise the seconds until a token is available.
+        """
+        ...
+
+
+class MemoryRateLimiter:
+    """Token buckets of this worker only, the limits apply per worker."""
+
+    def __init__(self, maxsize: int) -> None:
+        # (tokens, monotonic time of the last take) per key; an idle bucket is
+        # full again after refill_seconds, so it expires then
+        self.buckets: TTLCache[str, tuple[float, float]] = TTLCache(
+            maxsize=maxsize, ttl=0
+        )
+
+    async def take(self, key: str, bucket: Bucket) -> float:
+        now = time.monotonic()
+        tokens: float = bucket.burst
+        state = self.buckets.get(key)
+        if state is not None:
+            tokens = min(tokens, state[0] + (now - state[1]) * bucket.rate)
+
+        if tokens < 1:
+            return (1 - tokens) / bucket.rate
+        self.buckets.set(key, (tokens - 1, now), ttl=bucket.refill_seconds)
+        return 0
+
+
+class MongoRateLimiter:
+    """
+    Token buckets in the rate_limits collection, shared by every worker.
+    Each take is one atomic find_one_and_update, buckets are removed by the
+    TTL index on `expires_at` once they would be full again.
+    """
+
+    def __init__(self, db: AsyncIOMotorDatabase) -> None:
+        self.collection = RateLimitBucket.get_collection(db)
+
+    async def take(self, key: str, bucket: Bucket) -> float:
+        now = datetime.utcnow()
+        # Refill for the time since the last take, then take a token if one is
+        # left; a new bucket starts full
+        last = {"$ifNull": ["$updated_at", now]}
+        elapsed = {"$divide": [{"$subtract": [now, last]}, 1000]}
+        refilled = {
+            "$add": [
+                {"$ifNull": ["$tokens", bucket.burst]},
+                {"$multiply": [elapsed, bucket.rate]},
+            ]
+        }
+        pipeline = [
+            {"$set": {"tokens": {"$min": [bucket.burst, refilled]}}},
+            {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+            {
+                "$set": {
+                    "tokens": {
+                        "$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]
+                    },
+                    "updated_at": now,
+                    "expires_at": now + timedelta(seconds=bucket.refill_seconds),
+                }
+            },
+        ]
+
+        try:
+            doc = await self._update(key, pipeline)
+        except DuplicateKeyError:
+            # Another worker created the bucket first, update that one
+            doc = await self._update(key, pipeline)
+
+        if doc["allowed"]:
+            return 0
+        return (1 - doc["tokens"]) / bucket.rate
+
+    async def _update(self, key: str, pipeline: list[dict[str, Any]]) -> dict[str, Any]:
+        return await self.collection.find_one_and_update(
+            {"_id": key},
+            pipeline,
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+_memory_limiter = MemoryRateLimiter(settings.RATE_LIMIT_MEMORY_SIZE)
+
+
+def get_rate_limiter(db: AsyncIOMotorDatabase) -> RateLimiter | None:
+    """Limiter for RATE_LIMIT_BACKEND, or None when rate limiting is off."""
+    if settings.RATE_LIMIT_BACKEND == "mongo":
+        return MongoRateLimiter(db)
+    if settings.RATE_LIMIT_BACKEND == "memory":
+        return _memory_limiter
+    return None
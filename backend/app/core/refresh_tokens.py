@@ -0,0 +1,63 @@
+import hashlib
+import secrets
+from datetime import datetime, timedelta
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.config import settings
+from app.models import RefreshToken
+
+
+def _digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def issue_refresh_token(
+    db: AsyncIOMotorDatabase, user_id: str, family_id: str | None = None
+) -> str:
+    """
+    New refresh token for `user_id`, valid for REFRESH_TOKEN_EXPIRE_DAYS.
+    A login starts a family, each rotation continues it.
+    """
+    token = secrets.token_urlsafe(32)
+    await RefreshToken(
+        token_hash=_digest(token),
+        user_id=str(user_id),
+        family_id=family_id or str(ObjectId()),
+        expires_at=datetime.utcnow()
+        + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+    ).save(db)
+    return token
+
+
+async def rotate_refresh_token(
+    db: AsyncIOMotorDatabase, token: str
+) -> tuple[str, str] | None:
+    """
+    Spend `token` and issue its successor, returning the user id and the new
+    token, or None when `token` is unknown, expired or already spent.
+
+    A spent token presented again was copied by someone, so every token of
+    its family is revoked and both holders have to log in again.
+    """
+    now = datetime.utcnow()
+    collection = RefreshToken.get_collection(db)
+    token_hash = _digest(token)
+    doc = await collection.find_one_and_update(
+        {"token_hash": token_hash, "used_at": None, "expires_at": {"$gt": now}},
+        {"$set": {"used_at": now}},
+    )
+    if doc is None:
+        spent = await collection.find_one(
+            {"token_hash": token_hash, "used_at": {"$ne": None}}, {"family_id": 1}
+        )
+        if spent:
+            await collection.delete_many({"family_id": spent["family_id"]})
+        return None
+
+    successor = await issue_refresh_token(db, doc["user_id"], doc["family_id"])
+    return doc["user_id"], successor
+
+
+async def revoke_refresh_tokens(db: AsyncIOMotorDatabase, user_id: str) -> None:
+    """End every session of `user_id` once its access tokens expire."""
+    await RefreshToken.get_collection(db).delete_many({"user_id": str(user_id)})
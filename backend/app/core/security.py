@@ -1,25 +1,205 @@
+import asyncio
+import logging
+import math
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable, TypeVar
 import jwt
-from passlib.context import CryptContext
+from app.core.cache import token_cache
 from app.core.config import settings
+from app.core.metrics import PASSWORD_HASH_DURATION
+from app.models import TokenPayload, User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+if TYPE_CHECKING:
+    from passlib.context import CryptContext
+
+logger = logging.getLogger(__name__)
 
 
 ALGORITHM = "HS256"
 
+T = TypeVar("T")
+
+
+class PasswordHasherOverloaded(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event loop
+_hash_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
+_hash_queue_depth = 0
+
+
+def password_hash_queue_depth() -> int:
+    """Number of hash/verify calls currently queued or running in the pool."""
+    return _hash_queue_depth
+
+
+async def _run_in_hash_pool(func: Callable[..., T], *args: Any) -> T:
+    global _hash_queue_depth
+    if _hash_queue_depth >= settings.PASSWORD_HASH_MAX_QUEUE:
+        raise PasswordHasherOverloaded()
+
+    _hash_queue_depth += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_queue_depth -= 1
+
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+def create_access_token(
+    subject: str | Any,
+    expires_delta: timedelta,
+    claims: dict[str, Any] | None = None,
+) -> str:
+    now = datetime.now(timezone.utc)
+    to_encode = {
+        "exp": now + expires_delta,
+        "iat": now,
+        "sub": str(subject),
+        **(claims or {}),
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_user_access_token(user: User) -> str:
+    """Access token of `user`, carrying its role and active flag as claims."""
+    return create_access_token(
+        user.id,
+        timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+        claims={
+            "role": "superuser" if user.is_superuser else "user",
+            "active": user.is_active,
+        },
+    )
+
+
+def decode_access_token(token: str) -> TokenPayload:
+    """
+    Verify and decode an access token, raising InvalidTokenError or
+    ValidationError when it is not acceptable.
+
+    Verified claims are cached until the token expires, so the HMAC check
+    and JSON parsing run once per token per worker.
+    """
+    token_data = token_cache.get(token)
+    if token_data is not None:
+        return token_data
+
+    payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
+    token_data = TokenPayload(**payload)
+    if token_data.exp is not None:
+        token_cache.set(token, token_data, ttl=token_data.exp - time.time())
+    return token_data
+
+
+_verify_duration = PASSWORD_HASH_DURATION.labels("verify")
+_hash_duration = PASSWORD_HASH_DURATION.labels("hash")
+
+
+# bcrypt accepts costs 4 to 31; calibration measures at a cheap cost and
+# extrapolates, every extra round doubles the work
+BCRYPT_ROUNDS_RANGE = (4, 31)
+CALIBRATION_ROUNDS = 8
+CALIBRATION_SAMPLES = 5
+
+
+# passlib is only imported by the first hash or verify, see pwd_context
+_pwd_context: "CryptContext | None" = None
+_pwd_context_lock = threading.Lock()
+_pwd_policy: dict[str, int] = {}
+
+
+def pwd_context() -> "CryptContext":
+    """The passlib context, created on first use with the configured policy."""
+    global _pwd_context
+    if _pwd_context is None:
+        # Hashing runs in a thread pool, the first calls may race here
+        with _pwd_context_lock:
+            if _pwd_context is None:
+                from passlib.context import CryptContext
+
+                _pwd_context = CryptContext(
+                    schemes=["bcrypt"], deprecated="auto", **_pwd_policy
+                )
+    return _pwd_context
+
+
+def configure_password_hashing(rounds: int, tolerance: int = 0) -> None:
+    """
+    Hash new passwords at cost `rounds`. Stored hashes whose cost is outside
+    `rounds` ± `tolerance` are reported by password_needs_update.
+    """
+    global _pwd_policy
+    _pwd_policy = {
+        "bcrypt__default_rounds": rounds,
+        "bcrypt__min_rounds": max(rounds - tolerance, BCRYPT_ROUNDS_RANGE[0]),
+        "bcrypt__max_rounds": min(rounds + tolerance, BCRYPT_ROUNDS_RANGE[1]),
+    }
+    if _pwd_context is not None:
+        _pwd_context.update(**_pwd_policy)
+
+
+configure_password_hashing(settings.BCRYPT_ROUNDS)
+
+
+def calibrate_bcrypt_rounds(target_ms: float) -> int:
+    """Highest bcrypt cost whose verify takes at most `target_ms` on this host."""
+    from passlib.context import CryptContext
+
+    probe = CryptContext(schemes=["bcrypt"], bcrypt__rounds=CALIBRATION_ROUNDS)
+    hashed = probe.hash("calibration")
+    timings = []
+    for _ in range(CALIBRATION_SAMPLES):
+        start = time.perf_counter()
+        probe.verify("calibration", hashed)
+        timings.append(time.perf_counter() - start)
+
+    measured_ms = statistics.median(timings) * 1000
+    rounds = CALIBRATION_ROUNDS + math.floor(math.log2(target_ms / measured_ms))
+    return max(settings.BCRYPT_MIN_ROUNDS, min(rounds, BCRYPT_ROUNDS_RANGE[1]))
+
+
+async def calibrate_password_hashing() -> None:
+    """Apply BCRYPT_TARGET_VERIFY_MS, if set, at application startup."""
+    if not settings.BCRYPT_TARGET_VERIFY_MS:
+        return
+
+    loop = asyncio.get_running_loop()
+    rounds = await loop.run_in_executor(
+        _hash_executor, calibrate_bcrypt_rounds, settings.BCRYPT_TARGET_VERIFY_MS
+    )
+    # Workers measure independently and may land one round apart, tolerate
+    # that instead of rehashing users back and forth between them
+    configure_password_hashing(rounds, tolerance=1)
+    logger.info(f"bcrypt cost calibrated to {rounds} rounds")
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+    with _verify_duration.time():
+        return pwd_context().verify(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    return pwd_context.hash(password)
+    with _hash_duration.time():
+        return pwd_context().hash(password)
+
+
+def password_needs_update(hashed_password: str) -> bool:
+    """Whether a stored hash no longer matches the configured bcrypt cost."""
+    return pwd_context().needs_update(hashed_password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    return await _run_in_hash_pool(get_password_hash, password)
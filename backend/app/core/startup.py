@@ -0,0 +1,105 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable
+from typing import Any
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import PyMongoError
+from app.core.config import settings
+from app.core.db import close_mongo_connection, connect_to_mongo, get_database, init_db
+from app.core.metrics import STARTUP_PHASE_DURATION
+from app.core.security import calibrate_password_hashing
+from app.index_audit import run_index_audit
+from app.models import DOCUMENT_MODELS
+
+logger = logging.getLogger(__name__)
+
+# Ping retries start fast so a database that is already up costs one round
+# trip, and back off to this ceiling while it is still starting
+PING_INITIAL_BACKOFF_SECONDS = 0.05
+PING_MAX_BACKOFF_SECONDS = 5.0
+
+
+class StartupTimings:
+    """Wall time of each startup phase, phases may overlap."""
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self._start = time.perf_counter()
+
+    async def run(self, phase: str, step: Awaitable[Any]) -> Any:
+        start = time.perf_counter()
+        try:
+            return await step
+        finally:
+            self.phases[phase] = time.perf_counter() - start
+            STARTUP_PHASE_DURATION.labels(phase).set(self.phases[phase])
+
+    def summary(self) -> str:
+        total = time.perf_counter() - self._start
+        phases = ", ".join(f"{k} {v * 1000:.0f}ms" for k, v in self.phases.items())
+        return f"{total * 1000:.0f}ms ({phases})"
+
+
+async def wait_for_mongo(client: AsyncIOMotorClient) -> None:
+    """
+    Ping until MongoDB answers, backing off exponentially between attempts,
+    and give up after MONGODB_PING_TIMEOUT_SECONDS.
+    """
+    deadline = time.monotonic() + settings.MONGODB_PING_TIMEOUT_SECONDS
+    delay = PING_INITIAL_BACKOFF_SECONDS
+    while True:
+        try:
+            await client.admin.command("ping")
+            return
+        except PyMongoError as e:
+            if time.monotonic() + delay > deadline:
+                raise
+            logger.warning(f"MongoDB not ready ({e}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, PING_MAX_BACKOFF_SECONDS)
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    """Create the __indexes__ of every stored model, all collections at once."""
+    await asyncio.gather(*(model.ensure_indexes(db) for model in DOCUMENT_MODELS))
+
+
+async def run_startup() -> StartupTimings:
+    """
+    Bring a worker up on the pooled client: wait for MongoDB, then create
+    indexes while bcrypt is calibrated, then seed the first superuser while
+    the index audit runs. With STARTUP_INIT_DB off only the local steps run.
+    """
+    timings = StartupTimings()
+    connection = connect_to_mongo()
+
+    if settings.STARTUP_INIT_DB:
+        db = get_database()
+        await timings.run("ping", wait_for_mongo(connection.get_client()))
+        await asyncio.gather(
+            timings.run("indexes", ensure_indexes(db)),
+            timings.run("bcrypt_calibration", calibrate_password_hashing()),
+        )
+        await asyncio.gather(
+            timings.run("seed", init_db(db)),
+            timings.run("index_audit", run_index_audit(db)),
+        )
+    else:
+        await timings.run("bcrypt_calibration", calibrate_password_hashing())
+        await timings.run("index_audit", run_index_audit())
+
+    logger.info(f"Startup finished in {timings.summary()}")
+    return timings
+
+
+async def main() -> None:
+    try:
+        await run_startup()
+    finally:
+        close_mongo_connection()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
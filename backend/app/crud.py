@@ -1,18 +1,91 @@
+import asyncio
+import logging
 import uuid
+from datetime import datetime, timezone
+from typing import Any, TypeVar
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from pydantic import ValidationError
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from pymongo import ReturnDocument, UpdateOne, WriteConcern
+from pymongo.errors import BulkWriteError
+from pymongo_orm import AsyncMongoModel
+from pymongo_orm.utils.converters import doc_to_model, process_query
+from app.core.cache import invalidate_principal
+from app.core.security import (
+    PasswordHasherOverloaded,
+    get_password_hash_async,
+    password_needs_update,
+    verify_password_async,
+)
+from app.models import (
+    Item,
+    ItemBulkUpdate,
+    ItemCreate,
+    User,
+    UserCreate,
+    UserUpdate,
+)
+
+logger = logging.getLogger(__name__)
+
+M = TypeVar("M", bound=AsyncMongoModel)
+
+# The event loop only keeps weak references to tasks, hold the pending rehashes
+_rehash_tasks: set[asyncio.Task[None]] = set()
+
+
+async def find_one_and_update(
+    model_class: type[M],
+    *,
+    db: AsyncIOMotorDatabase,
+    query: dict[str, Any],
+    update: dict[str, Any],
+) -> M | None:
+    """
+    Apply `update` to the first document matching `query` and return it as it
+    is after the write, in a single round-trip. Returns None if nothing matched.
+    """
+    update.setdefault("$set", {})["updated_at"] = datetime.now(timezone.utc)
+    doc = await model_class.get_collection(db).find_one_and_update(
+        process_query(query), update, return_document=ReturnDocument.AFTER
+    )
+    return doc_to_model(doc, model_class) if doc else None
+
+
+async def find_documents(
+    model_class: type[AsyncMongoModel],
+    *,
+    db: AsyncIOMotorDatabase,
+    query: dict[str, Any],
+    projection: dict[str, Any] | None = None,
+    sort: list[tuple[str, Any]] | None = None,
+    skip: int = 0,
+    limit: int = 0,
+) -> list[dict[str, Any]]:
+    """
+    Like `model_class.find`, but returns the raw documents (with `_id` renamed
+    to `id`) instead of building a model per row, for callers that validate
+    the whole page at once.
+    """
+    cursor = model_class.get_collection(db).find(
+        process_query(query), projection, skip=skip, limit=limit
+    )
+    if sort:
+        cursor = cursor.sort(sort)
+
+    docs = await cursor.to_list(length=None)
+    for doc in docs:
+        doc["id"] = str(doc.pop("_id"))
+    return docs
 
 
 async def create_user(*, db: AsyncIOMotorDatabase, user_create: UserCreate) -> User:
     user_data = user_create.model_dump(exclude={"password"})
-    user_data["hashed_password"] = get_password_hash(user_create.password)
+    user_data["hashed_password"] = await get_password_hash_async(user_create.password)
 
     try:
-        result = await User(**user_data).save(db)
-        created_user = await User.find_one(db=db, query={"_id": result.id})
-        return User.model_validate(created_user)
+        # save() assigns the inserted _id, no need to read the document back
+        return await User(**user_data).save(db)
     except ValidationError as e:
         raise ValueError(f"Invalid user data: {e}")
 
@@ -23,13 +96,12 @@ async def update_user(
     user_data = user_in.model_dump(exclude_unset=True, exclude={"password"})
 
     if user_in.password:
-        user_data["hashed_password"] = get_password_hash(user_in.password)
+        user_data["hashed_password"] = await get_password_hash_async(user_in.password)
 
-    updated_data = db_user.model_copy(update=user_data)
-    await updated_data.save(db)
-
-    updated_user = await User.find_one(db, {"_id": db_user.id})
-    return User.model_validate(updated_user)
+    # save() writes the whole model, so it already holds the post-write state
+    updated_user = await db_user.model_copy(update=user_data).save(db)
+    invalidate_principal(db_user.id)
+    return updated_user
 
 
 async def get_user_by_email(*, db: AsyncIOMotorDatabase, email: str) -> User | None:
@@ -50,17 +122,112 @@ async def authenticate(
     db_user = await get_user_by_email(db=db, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    if not await verify_password_async(password, db_user.hashed_password):
         return None
+
+    if password_needs_update(db_user.hashed_password):
+        # The login doesn't wait, it already succeeded against the old hash
+        task = asyncio.create_task(
+            rehash_password(
+                db=db,
+                user_id=db_user.id,
+                hashed_password=db_user.hashed_password,
+                password=password,
+            )
+        )
+        _rehash_tasks.add(task)
+        task.add_done_callback(_rehash_tasks.discard)
     return db_user
 
 
+async def rehash_password(
+    *, db: AsyncIOMotorDatabase, user_id: str, hashed_password: str, password: str
+) -> None:
+    """Replace `hashed_password` with a hash at the current bcrypt cost."""
+    try:
+        new_hash = await get_password_hash_async(password)
+    except PasswordHasherOverloaded:
+        # Busy hashing logins, the next login tries again
+        return
+
+    try:
+        # Matching the old hash too, so a password changed meanwhile is kept
+        result = await User.get_collection(db).update_one(
+            {"_id": ObjectId(user_id), "hashed_password": hashed_password},
+            {"$set": {"hashed_password": new_hash}},
+        )
+    except Exception:
+        logger.exception(f"Could not store the rehashed password of user {user_id}")
+        return
+    if result.modified_count:
+        invalidate_principal(user_id)
+
+
 async def create_item(
     *, db: AsyncIOMotorDatabase, item_in: ItemCreate, owner_id: uuid.UUID
 ) -> Item:
     item_data = item_in.model_dump()
     item_data["owner_id"] = owner_id
 
-    result = await Item(**item_data).save(db)
-    created_item = await Item.find_one(db, {"_id": result.inserted_id})
-    return Item.model_validate(created_item)
+    return await Item(**item_data).save(db)
+
+
+async def create_items(
+    *,
+    db: AsyncIOMotorDatabase,
+    items_in: list[ItemCreate],
+    owner_id: str,
+    ordered: bool = False,
+    write_concern: WriteConcern | None = None,
+) -> tuple[int, list[dict[str, Any]]]:
+    """
+    Insert `items_in` with a single insert_many.
+
+    Returns the number of inserted documents and the server's write errors,
+    whose `index` points into `items_in`. With `ordered`, the server stops
+    at the first error.
+    """
+    collection = Item.get_collection(db)
+    if write_concern is not None:
+        collection = collection.with_options(write_concern=write_concern)
+
+    now = datetime.utcnow()
+    docs = [
+        {
+            **item_in.model_dump(exclude={"id"}),
+            "owner_id": owner_id,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for item_in in items_in
+    ]
+    try:
+        result = await collection.insert_many(docs, ordered=ordered)
+    except BulkWriteError as e:
+        return e.details["nInserted"], e.details["writeErrors"]
+    return len(result.inserted_ids), []
+
+
+async def update_items(
+    *, db: AsyncIOMotorDatabase, items_in: list[ItemBulkUpdate], query: dict[str, Any]
+) -> int:
+    """
+    Apply each of `items_in` to its item with one unordered bulk_write.
+    `query` is added to every per-id filter, so items it excludes are left
+    untouched. Returns the number of matched items.
+    """
+    now = datetime.now(timezone.utc)
+    operations = [
+        UpdateOne(
+            {**query, "_id": item_in.id},
+            {
+                "$set": {
+                    **item_in.model_dump(exclude={"id"}, exclude_unset=True),
+                    "updated_at": now,
+                }
+            },
+        )
+        for item_in in items_in
+    ]
+    result = await Item.get_collection(db).bulk_write(operations, ordered=False)
+    return result.matched_count
@@ -0,0 +1,107 @@
+import logging
+import sys
+from dataclasses import dataclass
+from typing import Any
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo_orm import AsyncMongoModel
+from app.api.pagination import KEYSET_SORT
+from app.core.config import settings
+from app.core.db import close_mongo_connection, get_database
+from app.models import Item, User
+
+logger = logging.getLogger(__name__)
+
+# Plan stages meaning a query is not served by an index
+UNINDEXED_STAGES = ("COLLSCAN", "SORT")
+
+
+class IndexAuditError(Exception):
+    """Raised when a canonical query shape is not covered by an index."""
+
+
+@dataclass
+class QueryShape:
+    name: str
+    model: type[AsyncMongoModel]
+    query: dict[str, Any]
+    sort: list[tuple[str, Any]] | None = None
+
+
+# The query shapes our hot routes issue, mirrored from the route handlers
+QUERY_SHAPES = [
+    QueryShape("items list (owner)", Item, {"owner_id": str(ObjectId())}, KEYSET_SORT),
+    QueryShape("items list (superuser)", Item, {}, KEYSET_SORT),
+    QueryShape("user lookup by email", User, {"email": "audit@example.com"}),
+    QueryShape("users list", User, {}, KEYSET_SORT),
+]
+
+
+def plan_stages(plan: Any) -> list[str]:
+    """Collect every `stage` name in an explain() plan tree."""
+    stages = []
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            stages.append(plan["stage"])
+        for value in plan.values():
+            stages.extend(plan_stages(value))
+    elif isinstance(plan, list):
+        for value in plan:
+            stages.extend(plan_stages(value))
+    return stages
+
+
+async def audit_indexes(db: AsyncIOMotorDatabase) -> list[str]:
+    """
+    Explain each canonical query shape and return a description of every
+    shape whose winning plan contains a COLLSCAN or an in-memory SORT.
+    """
+    problems = []
+    for shape in QUERY_SHAPES:
+        cursor = shape.model.get_collection(db).find(shape.query)
+        if shape.sort:
+            cursor = cursor.sort(shape.sort)
+        explain = await cursor.limit(100).explain()
+
+        stages = plan_stages(explain["queryPlanner"]["winningPlan"])
+        for stage in UNINDEXED_STAGES:
+            if stage in stages:
+                problems.append(f"{shape.name}: {stage}")
+    return problems
+
+
+async def run_index_audit(db: AsyncIOMotorDatabase | None = None) -> None:
+    """Startup hook, behaviour controlled by settings.INDEX_AUDIT."""
+    if settings.INDEX_AUDIT == "off":
+        return
+
+    if db is None:
+        db = get_database()
+    problems = await audit_indexes(db)
+    for problem in problems:
+        logger.warning(f"Index audit: {problem}")
+    if problems and settings.INDEX_AUDIT == "fail":
+        raise IndexAuditError(", ".join(problems))
+
+
+async def main() -> int:
+    logger.info("Auditing index coverage")
+    try:
+        problems = await audit_indexes(get_database())
+    finally:
+        close_mongo_connection()
+
+    for problem in problems:
+        logger.error(f"Index audit: {problem}")
+    if problems:
+        return 1
+
+    logger.info("All query shapes are served by indexes")
+    return 0
+
+
+if __name__ == "__main__":
+    import asyncio
+
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(main()))
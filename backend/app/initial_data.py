@@ -1,22 +1,15 @@
 import logging
-from motor.motor_asyncio import AsyncIOMotorClient
-from app.core.config import settings
-from app.core.db import init_db
+from app.core import startup
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
-async def init() -> None:
-    # Initialize MongoDB connection
-    client = AsyncIOMotorClient(settings.MONGODB_URI)
-    db = client[settings.MONGODB_DB_NAME]
-    await init_db(db)
-
-
 async def main() -> None:
+    # The same steps every worker runs in its lifespan: wait for MongoDB,
+    # create indexes and seed the first superuser
     logger.info("Creating initial data")
-    await init()
+    await startup.main()
     logger.info("Initial data created")
 
 
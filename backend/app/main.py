@@ -1,9 +1,26 @@
-import sentry_sdk
-from fastapi import FastAPI
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request, status
+from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
+from prometheus_client import REGISTRY
 from starlette.middleware.cors import CORSMiddleware
 from app.api.main import api_router
+from app.api.pagination import count_cache
+from app.core.cache import principal_cache, token_cache
 from app.core.config import settings
+from app.core.db import close_mongo_connection, get_database
+from app.core.deletion_jobs import start_deletion_worker, stop_deletion_worker
+from app.core.email_outbox import start_email_dispatcher, stop_email_dispatcher
+from app.core.metrics import (
+    PASSWORD_HASH_QUEUE_DEPTH,
+    CacheStatsCollector,
+    MetricsMiddleware,
+    metrics_endpoint,
+)
+from app.core.security import PasswordHasherOverloaded, password_hash_queue_depth
+from app.core.startup import run_startup
+from app.utils import preload_email_templates
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -11,12 +28,31 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 
 
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
+    # Only imported when enabled, it is the slowest import of the app
+    import sentry_sdk
+
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # One pooled client per worker, shared by every request and by startup
+    await run_startup()
+    if settings.emails_enabled:
+        preload_email_templates()
+        start_email_dispatcher(get_database())
+    start_deletion_worker()
+    yield
+    await stop_deletion_worker()
+    await stop_email_dispatcher()
+    close_mongo_connection()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
+    lifespan=lifespan,
 )
 
 # Set all CORS enabled origins
@@ -30,3 +66,25 @@ if settings.all_cors_origins:
     )
 
 app.include_router(api_router, prefix=settings.API_V1_STR)
+
+if settings.METRICS_ENABLED:
+    # Added last so it wraps every other middleware
+    app.add_middleware(MetricsMiddleware, route_id=custom_generate_unique_id)
+    app.add_route("/metrics", metrics_endpoint, include_in_schema=False)
+    PASSWORD_HASH_QUEUE_DEPTH.set_function(password_hash_queue_depth)
+    REGISTRY.register(
+        CacheStatsCollector(
+            {"principal": principal_cache, "token": token_cache, "count": count_cache}
+        )
+    )
+
+
+@app.exception_handler(PasswordHasherOverloaded)
+async def password_hasher_overloaded_handler(
+    _request: Request, _exc: PasswordHasherOverloaded
+) -> JSONResponse:
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Too many concurrent password operations, retry shortly"},
+        headers={"Retry-After": "1"},
+    )
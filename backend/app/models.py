@@ -1,11 +1,20 @@
-from typing import Optional, List
+from functools import lru_cache
+from typing import Literal, Optional, List
 from datetime import datetime, timezone
-from pydantic import EmailStr, Field, BaseModel, ConfigDict, Field, field_serializer
+from pydantic import (
+    EmailStr,
+    Field,
+    BaseModel,
+    ConfigDict,
+    Field,
+    field_serializer,
+    model_validator,
+)
 from pydantic_core import core_schema
 from bson import ObjectId
 from typing import Any
 from pymongo_orm import AsyncMongoModel
-from pymongo import ASCENDING, DESCENDING
+from pymongo import ASCENDING, DESCENDING, TEXT
 
 
 class PyObjectId:
@@ -38,6 +47,19 @@ class PyObjectId:
         return ObjectId(value)
 
 
+@lru_cache
+def _projection_fields(model: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(field for field in model.model_fields if field != "id")
+
+
+def projection_for(model: type[BaseModel]) -> dict[str, int]:
+    """
+    Mongo projection loading only the fields `model` declares, so reads that
+    build a response model skip hashed_password and any other stored extras.
+    """
+    return dict.fromkeys(_projection_fields(model), 1)
+
+
 class UserBase(AsyncMongoModel):
     __collection__ = "users"
     __indexes__ = [
@@ -46,6 +68,17 @@ class UserBase(AsyncMongoModel):
             "fields": [("full_name", ASCENDING), ("created_at", DESCENDING)],
             "background": True,
         },
+        # Backs keyset pagination, see app.api.pagination.KEYSET_SORT
+        {
+            "fields": [("created_at", DESCENDING), ("_id", DESCENDING)],
+            "background": True,
+        },
+        # Backs the q search in read_users, see app.api.search
+        {
+            "fields": [("full_name", TEXT), ("email", TEXT)],
+            "name": "users_text",
+            "background": True,
+        },
     ]
 
     __write_concern__ = {"w": "majority", "j": True}
@@ -123,7 +156,8 @@ class UserPublic(UserBase):
 
 class UsersPublic(BaseModel):
     data: List[UserPublic]
-    count: int
+    count: Optional[int]
+    next_cursor: Optional[str] = None
 
 
 class ItemBase(AsyncMongoModel):
@@ -133,6 +167,31 @@ class ItemBase(AsyncMongoModel):
             "fields": [("title", ASCENDING), ("created_at", DESCENDING)],
             "background": True,
         },
+        # Backs keyset pagination, see app.api.pagination.KEYSET_SORT
+        {
+            "fields": [("created_at", DESCENDING), ("_id", DESCENDING)],
+            "background": True,
+        },
+        # Backs the owner-scoped listing of non-superusers in read_items
+        {
+            "fields": [
+                ("owner_id", ASCENDING),
+                ("created_at", DESCENDING),
+                ("_id", DESCENDING),
+            ],
+            "background": True,
+        },
+        # Backs the batched cascade delete, see app.core.deletion_jobs
+        {
+            "fields": [("owner_id", ASCENDING), ("_id", ASCENDING)],
+            "background": True,
+        },
+        # Backs the q search in read_items, see app.api.search
+        {
+            "fields": [("title", TEXT), ("description", TEXT)],
+            "name": "items_text",
+            "background": True,
+        },
     ]
 
     __write_concern__ = {"w": "majority", "j": True}
@@ -167,25 +226,243 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(BaseModel):
     data: List[ItemPublic]
+    count: Optional[int]
+    next_cursor: Optional[str] = None
+
+
+class BulkRowError(BaseModel):
+    index: int
+    message: str
+
+
+class ItemsBulkResult(BaseModel):
+    inserted_count: int
+    errors: List[BulkRowError]
+
+
+class ItemsFilter(BaseModel):
+    q: Optional[str] = Field(default=None, min_length=1)
+    owner_id: Optional[PyObjectId] = None
+
+    @model_validator(mode="after")
+    def check_not_empty(self):
+        # An empty filter would select every item the caller can see
+        if self.q is None and self.owner_id is None:
+            raise ValueError("filter needs at least one criterion")
+        return self
+
+
+class ItemBulkUpdate(BaseModel):
+    id: PyObjectId
+    title: Optional[str] = Field(default=None, min_length=1, max_length=255)
+    description: Optional[str] = Field(default=None, max_length=255)
+
+
+class ItemsBulkUpdate(BaseModel):
+    """Either per-item `items`, or one `update` applied to every `filter` match."""
+
+    items: Optional[List[ItemBulkUpdate]] = None
+    filter: Optional[ItemsFilter] = None
+    update: Optional[ItemUpdate] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.items is None) == (self.filter is None):
+            raise ValueError("provide either items or filter")
+        if self.filter is not None and self.update is None:
+            raise ValueError("filter requires update")
+        return self
+
+
+class ItemsBulkDelete(BaseModel):
+    ids: Optional[List[PyObjectId]] = None
+    filter: Optional[ItemsFilter] = None
+
+    @model_validator(mode="after")
+    def check_target(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("provide either ids or filter")
+        return self
+
+
+class BulkOutcome(BaseModel):
+    id: str
+    status: Literal["updated", "deleted", "not_found", "forbidden"]
+
+
+class ItemsBulkWriteResult(BaseModel):
     count: int
+    # Per-id outcomes, only for requests addressing items by id
+    results: List[BulkOutcome] = []
 
 
 class Message(BaseModel):
     message: str
 
 
+class EmailOutbox(AsyncMongoModel):
+    """Queued email, delivered by app.core.email_outbox.EmailDispatcher."""
+
+    __collection__ = "email_outbox"
+    __indexes__ = [
+        {
+            "fields": [("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+            "background": True,
+        },
+        # Sent and failed messages are removed at purge_at
+        {
+            "fields": [("purge_at", ASCENDING)],
+            "expireAfterSeconds": 0,
+            "background": True,
+        },
+    ]
+
+    email_to: EmailStr
+    subject: str
+    # May hold an initial password or a reset link, unset once the message is
+    # sent or given up on
+    html_content: Optional[str] = None
+    status: Literal["pending", "sending", "sent", "failed"] = "pending"
+    attempts: int = 0
+    next_attempt_at: datetime = Field(default_factory=datetime.utcnow)
+    claimed_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+    purge_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
+class DeletionJob(AsyncMongoModel):
+    """
+    Cascade delete of a removed user's items, run by app.core.deletion_jobs.
+    `last_id` checkpoints the last deleted batch so a job can be resumed.
+    """
+
+    __collection__ = "deletion_jobs"
+    __indexes__ = [
+        # One job per user, enqueueing twice returns the existing job
+        {"fields": [("user_id", ASCENDING)], "unique": True, "background": True},
+        {
+            "fields": [("status", ASCENDING), ("claimed_at", ASCENDING)],
+            "background": True,
+        },
+        # Finished jobs are only kept for a month
+        {
+            "fields": [("finished_at", ASCENDING)],
+            "expireAfterSeconds": 30 * 24 * 60 * 60,
+            "background": True,
+        },
+    ]
+
+    user_id: str
+    # created until the user is removed, cancelled when the user was still
+    # there as the job ran, see app.core.deletion_jobs
+    status: Literal["created", "pending", "running", "done", "cancelled"] = "created"
+    deleted_items: int = 0
+    last_id: Optional[str] = None
+    claimed_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+
+class DeletionJobPublic(BaseModel):
+    id: str
+    user_id: str
+    status: Literal["created", "pending", "running", "done", "cancelled"]
+    deleted_items: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
+class UserDeleted(Message):
+    # Follow the removal of the user's items at /users/deletion-jobs/{job_id}
+    job_id: str
+
+
+class RateLimitBucket(AsyncMongoModel):
+    """
+    Token bucket shared between workers by app.core.rate_limit. `_id` is the
+    bucket key; a bucket left alone until `expires_at` is full again.
+    """
+
+    __collection__ = "rate_limits"
+    __indexes__ = [
+        {
+            "fields": [("expires_at", ASCENDING)],
+            "expireAfterSeconds": 0,
+            "background": True,
+        },
+    ]
+
+    tokens: float
+    allowed: bool
+    expires_at: datetime
+
+
+class RefreshToken(AsyncMongoModel):
+    """
+    Refresh token, stored as its SHA-256 only. Each one is spent by a single
+    refresh that issues its successor in the same family, see
+    app.core.refresh_tokens.
+    """
+
+    __collection__ = "refresh_tokens"
+    __indexes__ = [
+        {"fields": [("token_hash", ASCENDING)], "unique": True, "background": True},
+        {"fields": [("user_id", ASCENDING)], "background": True},
+        {"fields": [("family_id", ASCENDING)], "background": True},
+        {
+            "fields": [("expires_at", ASCENDING)],
+            "expireAfterSeconds": 0,
+            "background": True,
+        },
+    ]
+
+    token_hash: str
+    user_id: str
+    family_id: str
+    expires_at: datetime
+    used_at: Optional[datetime] = None
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: Optional[str] = None
     id: str
     full_name: str | None = ""
     email: str
 
 
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
 class TokenPayload(BaseModel):
     sub: Optional[str] = None
+    exp: Optional[int] = None
+    iat: Optional[int] = None
+    # Absent from tokens issued before the claims were added
+    role: Optional[Literal["user", "superuser"]] = None
+    active: Optional[bool] = None
+
+
+class Principal(BaseModel):
+    """The caller as routes authorize it, see deps.get_current_principal."""
+
+    id: str
+    is_superuser: bool = False
 
 
 class NewPassword(BaseModel):
     token: str
     new_password: str = Field(..., min_length=8, max_length=40)
+
+
+# Every stored model, app.core.startup creates their __indexes__
+DOCUMENT_MODELS: tuple[type[AsyncMongoModel], ...] = (
+    User,
+    Item,
+    EmailOutbox,
+    DeletionJob,
+    RateLimitBucket,
+    RefreshToken,
+)
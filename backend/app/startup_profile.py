@@ -0,0 +1,161 @@
+"""
+Import-time tree and time to first request of app.main, in a fresh interpreter.
+
+    python -m app.startup_profile [--min-ms 5] [--no-db]
+
+The tree comes from `python -X importtime`, modules importing in less than
+--min-ms are left out. Time to first request covers importing app.main,
+running the lifespan startup and serving GET /utils/health-check/ in-process.
+--no-db skips the database steps of the startup (STARTUP_INIT_DB=false).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+
+# Regression budgets, checked by app/tests/test_startup_profile.py; generous
+# enough for a loaded CI runner, a change that trips them deserves a look
+IMPORT_BUDGET_MS = 1500.0
+FIRST_REQUEST_BUDGET_MS = 3000.0
+# Optional or rarely needed dependencies that `import app.main` must not load
+DEFERRED_MODULES = ("sentry_sdk", "emails", "jinja2", "passlib")
+
+
+@dataclass
+class ImportNode:
+    name: str
+    self_ms: float
+    cumulative_ms: float
+    children: list["ImportNode"] = field(default_factory=list)
+
+
+@dataclass
+class StartupProfile:
+    imports: list[ImportNode]
+    # Measured inside the child, from its first statement
+    import_ms: float
+    lifespan_ms: float
+    first_request_ms: float
+    # Wall time of the whole child process, interpreter start and exit included
+    process_ms: float
+    deferred_loaded: list[str]
+
+
+def parse_importtime(stderr: str) -> list[ImportNode]:
+    """
+    Build the import tree from `-X importtime` output. Modules are reported
+    after everything they import, two spaces of indent per level.
+    """
+    pending: list[tuple[int, ImportNode]] = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:") :].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        node = ImportNode(name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000)
+        while pending and pending[-1][0] > depth:
+            node.children.insert(0, pending.pop()[1])
+        pending.append((depth, node))
+    return [node for _, node in pending]
+
+
+def format_tree(nodes: list[ImportNode], min_ms: float, depth: int = 0) -> list[str]:
+    lines = []
+    for node in nodes:
+        if node.cumulative_ms < min_ms:
+            continue
+        lines.append(
+            f"{node.cumulative_ms:9.1f} {node.self_ms:7.1f}  {'  ' * depth}{node.name}"
+        )
+        lines.extend(format_tree(node.children, min_ms, depth + 1))
+    return lines
+
+
+def profile_startup(*, init_db: bool = True) -> StartupProfile:
+    """Run the `--child` measurement in a new interpreter and collect it."""
+    env = dict(os.environ)
+    if not init_db:
+        env["STARTUP_INIT_DB"] = "false"
+
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "app.startup_profile", "--child"],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    process_ms = (time.perf_counter() - start) * 1000
+
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    return StartupProfile(
+        imports=parse_importtime(result.stderr),
+        process_ms=process_ms,
+        **timings,
+    )
+
+
+async def _serve_first_request() -> float:
+    """Run the lifespan startup and one request, return when it was served."""
+    import httpx
+    from app.core.config import settings
+    from app.main import app
+
+    async with app.router.lifespan_context(app):
+        lifespan_done = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://profile"
+        ) as client:
+            response = await client.get(f"{settings.API_V1_STR}/utils/health-check/")
+            response.raise_for_status()
+        return lifespan_done
+
+
+def _child() -> None:
+    start = time.perf_counter()
+    import app.main  # noqa: F401
+
+    imported = time.perf_counter()
+    deferred_loaded = [name for name in DEFERRED_MODULES if name in sys.modules]
+    lifespan_done = asyncio.run(_serve_first_request())
+    served = time.perf_counter()
+
+    timings = {
+        "import_ms": (imported - start) * 1000,
+        "lifespan_ms": (lifespan_done - imported) * 1000,
+        "first_request_ms": (served - start) * 1000,
+        "deferred_loaded": deferred_loaded,
+    }
+    print(json.dumps(timings))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--min-ms", type=float, default=5.0)
+    parser.add_argument("--no-db", action="store_true")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child()
+        return
+
+    profile = profile_startup(init_db=not args.no_db)
+    print(f"Imports over {args.min_ms:g} ms (cumulative ms, self ms)")
+    print("\n".join(format_tree(profile.imports, args.min_ms)))
+    print()
+    print(f"import app.main      {profile.import_ms:8.1f} ms")
+    print(f"lifespan startup     {profile.lifespan_ms:8.1f} ms")
+    print(f"first request served {profile.first_request_ms:8.1f} ms")
+    print(f"whole process        {profile.process_ms:8.1f} ms")
+    print(f"deferred modules loaded at import: {profile.deferred_loaded or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,12 @@
+import csv
+import io
+import json
 import pytest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app.core.config import settings
+from app.models import Item
 from app.tests.utils.item import create_random_item
 from bson import ObjectId
 
@@ -185,3 +190,300 @@ async def test_delete_item_not_enough_permissions(
     assert response.status_code == 400
     content = response.json()
     assert content["detail"] == "Not enough permissions"
+
+
+def test_read_items_keyset_pagination(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    for i in range(3):
+        client.post(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            json={"title": f"Paged {i}"},
+        )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/?limit=1000", headers=superuser_token_headers
+    )
+    all_ids = [item["id"] for item in response.json()["data"]]
+
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        page = response.json()
+        seen.extend(item["id"] for item in page["data"])
+        if not page["next_cursor"]:
+            break
+        params["after"] = page["next_cursor"]
+
+    assert len(all_ids) >= 3
+    assert seen == all_ids
+
+
+def test_create_items_bulk_json(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    rows = [
+        {"title": "Bulk 0"},
+        {"title": ""},
+        {"title": "Bulk 2", "description": "Fighters"},
+    ]
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        params={"chunk_size": 2},
+        json=rows,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["inserted_count"] == 2
+    assert [error["index"] for error in content["errors"]] == [1]
+    assert content["errors"][0]["message"].startswith("title:")
+
+    with patch("app.core.config.settings.SEARCH_BACKEND", "regex"):
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=normal_user_token_headers,
+            params={"q": "Bulk "},
+        )
+    titles = {item["title"] for item in response.json()["data"]}
+    assert {"Bulk 0", "Bulk 2"} <= titles
+
+
+def test_create_items_bulk_ndjson_ordered(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    body = b'{"title": "Stream 0"}\nnot json\n{"title": "Stream 2"}\n'
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers={**superuser_token_headers, "Content-Type": "application/x-ndjson"},
+        params={"ordered": True},
+        content=body,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["inserted_count"] == 1
+    assert [error["index"] for error in content["errors"]] == [1]
+
+
+def test_create_items_bulk_invalid_body(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json={"title": "Not an array"},
+    )
+    assert response.status_code == 400
+
+
+def test_create_items_bulk_rejects_unacknowledged_journal(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        params={"w": "0", "j": "true"},
+        json=[{"title": "Journaled"}],
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_update_items_bulk(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Mine"},
+    )
+    mine = response.json()["id"]
+    others = await create_random_item(db)
+    missing = str(ObjectId())
+
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json={
+            "items": [
+                {"id": mine, "title": "Mine, renamed"},
+                {"id": str(others.id), "title": "Not mine"},
+                {"id": missing, "title": "Nobody's"},
+            ]
+        },
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 1
+    assert content["results"] == [
+        {"id": mine, "status": "updated"},
+        {"id": str(others.id), "status": "forbidden"},
+        {"id": missing, "status": "not_found"},
+    ]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{mine}", headers=normal_user_token_headers
+    )
+    assert response.json()["title"] == "Mine, renamed"
+
+
+def test_update_items_bulk_requires_one_target(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=superuser_token_headers,
+        json={"items": [], "filter": {"q": "x"}, "update": {"title": "x"}},
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_delete_items_bulk(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Doomed"},
+    )
+    mine = response.json()["id"]
+    others = await create_random_item(db)
+
+    response = client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/bulk",
+        headers=normal_user_token_headers,
+        json={"ids": [mine, str(others.id)]},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] == 1
+    assert content["results"] == [
+        {"id": mine, "status": "deleted"},
+        {"id": str(others.id), "status": "forbidden"},
+    ]
+    assert await Item.find_one(db=db, query={"_id": ObjectId(mine)}) is None
+    assert await Item.find_one(db=db, query={"_id": others.id}) is not None
+
+
+def test_delete_items_bulk_by_filter(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    for _ in range(2):
+        client.post(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            json={"title": "Filtered out"},
+        )
+
+    with patch("app.core.config.settings.SEARCH_BACKEND", "regex"):
+        response = client.request(
+            "DELETE",
+            f"{settings.API_V1_STR}/items/bulk",
+            headers=superuser_token_headers,
+            json={"filter": {"q": "Filtered out"}},
+        )
+    assert response.status_code == 200
+    assert response.json() == {"count": 2, "results": []}
+
+
+def test_update_items_bulk_by_filter(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        json={"title": "Relabel me"},
+    )
+
+    with patch("app.core.config.settings.SEARCH_BACKEND", "regex"):
+        # Other users' items are outside the write filter
+        response = client.patch(
+            f"{settings.API_V1_STR}/items/bulk",
+            headers=normal_user_token_headers,
+            json={"filter": {"q": "Relabel me"}, "update": {"description": "x"}},
+        )
+        assert response.json()["count"] == 0
+
+        response = client.patch(
+            f"{settings.API_V1_STR}/items/bulk",
+            headers=superuser_token_headers,
+            json={"filter": {"q": "Relabel me"}, "update": {"description": "x"}},
+        )
+    assert response.status_code == 200
+    assert response.json()["count"] == 1
+
+
+def test_export_items(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    superuser_token_headers: dict[str, str],
+) -> None:
+    client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        json={"title": "Not exported"},
+    )
+    client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Exported", "description": "a, b"},
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    titles = {row["title"] for row in rows}
+    assert "Exported" in titles
+    assert "Not exported" not in titles
+    assert len({row["owner_id"] for row in rows}) == 1
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=normal_user_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    csv_rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(csv_rows) == len(rows)
+    assert {"id", "title", "description", "owner_id"} <= set(csv_rows[0])
+    assert {row["description"] for row in csv_rows} >= {"a, b"}
+
+
+def test_owner_reads_and_deletes_own_item(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Owned"},
+    )
+    item_id = response.json()["id"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{item_id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/items/{item_id}", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
@@ -118,3 +118,152 @@ def test_reset_password_invalid_token(client: TestClient) -> None:
     result = response.json()
     assert response.status_code == 400
     assert result["detail"] == "Invalid token"
+
+
+def test_get_access_token_hasher_overloaded(client: TestClient) -> None:
+    """Test login is shed with 503 when the password hash queue is full"""
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    with patch("app.core.config.settings.PASSWORD_HASH_MAX_QUEUE", 0):
+        response = client.post(
+            f"{settings.API_V1_STR}/login/access-token", data=login_data
+        )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+@pytest.mark.parametrize("backend", ["memory", "mongo"])
+def test_get_access_token_rate_limited(client: TestClient, backend: str) -> None:
+    """Test login is throttled per email before any password check"""
+    login_data = {"username": random_email(), "password": "incorrect"}
+    with (
+        patch("app.core.config.settings.RATE_LIMIT_BACKEND", backend),
+        patch("app.core.config.settings.RATE_LIMIT_EMAIL_BURST", 2),
+    ):
+        for _ in range(2):
+            response = client.post(
+                f"{settings.API_V1_STR}/login/access-token", data=login_data
+            )
+            assert response.status_code == 400
+
+        with patch("app.api.routes.login.crud.authenticate") as authenticate:
+            response = client.post(
+                f"{settings.API_V1_STR}/login/access-token", data=login_data
+            )
+        authenticate.assert_not_called()
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) > 0
+
+
+def test_recovery_password_rate_limited(client: TestClient) -> None:
+    """Test password recovery is throttled per email before the user lookup"""
+    email = random_email()
+    with (
+        patch("app.core.config.settings.RATE_LIMIT_BACKEND", "memory"),
+        patch("app.core.config.settings.RATE_LIMIT_EMAIL_BURST", 1),
+    ):
+        response = client.post(f"{settings.API_V1_STR}/password-recovery/{email}")
+        assert response.status_code == 404
+
+        with patch("app.api.routes.login.crud.get_user_by_email") as get_user:
+            response = client.post(f"{settings.API_V1_STR}/password-recovery/{email}")
+        get_user.assert_not_called()
+    assert response.status_code == 429
+
+
+def test_reset_password_rate_limited(client: TestClient) -> None:
+    """Test password reset is throttled per client IP"""
+    data = {"new_password": "changethis", "token": "invalid"}
+    with (
+        patch("app.core.config.settings.RATE_LIMIT_BACKEND", "memory"),
+        patch("app.core.config.settings.RATE_LIMIT_IP_BURST", 1),
+    ):
+        # The per-IP bucket may already be partly used by earlier tests
+        statuses = [
+            client.post(f"{settings.API_V1_STR}/reset-password/", json=data).status_code
+            for _ in range(2)
+        ]
+    assert statuses[-1] == 429
+
+
+async def _login(client: TestClient, db: AsyncIOMotorDatabase) -> dict[str, str]:
+    email = random_email()
+    password = random_lower_string()
+    await create_user(db=db, user_create=UserCreate(email=email, password=password))
+    login_data = {"username": email, "password": password}
+    response = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_rotation(
+    client: TestClient, db: AsyncIOMotorDatabase
+) -> None:
+    """Test a refresh token is spent by one refresh and replaced"""
+    tokens = await _login(client, db)
+    assert tokens["refresh_token"]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["email"] == tokens["email"]
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    response = client.post(
+        f"{settings.API_V1_STR}/login/test-token",
+        headers={"Authorization": f"Bearer {refreshed['access_token']}"},
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_reuse_revokes_family(
+    client: TestClient, db: AsyncIOMotorDatabase
+) -> None:
+    """Test replaying a spent refresh token ends the whole session"""
+    tokens = await _login(client, db)
+    url = f"{settings.API_V1_STR}/login/refresh-token"
+    response = client.post(url, json={"refresh_token": tokens["refresh_token"]})
+    successor = response.json()["refresh_token"]
+
+    response = client.post(url, json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid refresh token"
+    response = client.post(url, json={"refresh_token": successor})
+    assert response.status_code == 400
+
+
+def test_refresh_token_invalid(client: TestClient) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": random_lower_string()},
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_revoked_on_password_reset(
+    client: TestClient, db: AsyncIOMotorDatabase
+) -> None:
+    """Test a password reset ends the user's sessions"""
+    tokens = await _login(client, db)
+    response = client.post(
+        f"{settings.API_V1_STR}/reset-password/",
+        json={
+            "new_password": random_lower_string(),
+            "token": generate_password_reset_token(email=tokens["email"]),
+        },
+    )
+    assert response.status_code == 200
+
+    response = client.post(
+        f"{settings.API_V1_STR}/login/refresh-token",
+        json={"refresh_token": tokens["refresh_token"]},
+    )
+    assert response.status_code == 400
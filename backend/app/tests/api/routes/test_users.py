@@ -1,3 +1,4 @@
+import json
 from bson import ObjectId
 import pytest
 from unittest.mock import patch
@@ -5,8 +6,10 @@ from fastapi.testclient import TestClient
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app import crud
 from app.core.config import settings
+from app.core.deletion_jobs import run_deletion_jobs
 from app.core.security import verify_password
-from app.models import UserCreate
+from app.models import ItemCreate, User, UserCreate
+from app.tests.utils.user import user_authentication_headers
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -46,9 +49,10 @@ async def test_create_user_new_email(
     db: AsyncIOMotorDatabase,
 ) -> None:
     with (
-        patch("app.utils.send_email", return_value=None),
+        patch("app.utils.enqueue_email") as enqueue_email,
         patch("app.core.config.settings.SMTP_HOST", "smtp.example.com"),
         patch("app.core.config.settings.SMTP_USER", "admin@example.com"),
+        patch("app.core.config.settings.EMAILS_FROM_EMAIL", "info@example.com"),
     ):
         username = random_email()
         password = random_lower_string()
@@ -62,6 +66,8 @@ async def test_create_user_new_email(
         user = await db.users.find_one({"email": username})
         assert user
         assert user["email"] == created_user["email"]
+        enqueue_email.assert_awaited_once()
+        assert enqueue_email.call_args.kwargs["email_to"] == username
 
 
 # Test getting existing user
@@ -205,6 +211,86 @@ async def test_delete_user_super_user(
     assert deleted_user is None
 
 
+@pytest.mark.asyncio
+async def test_delete_user_cascades_to_items(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    user = await crud.create_user(
+        db=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    for _ in range(3):
+        await crud.create_item(
+            db=db, item_in=ItemCreate(title="Owned"), owner_id=user.id
+        )
+
+    response = client.delete(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    assert await db.items.count_documents({"owner_id": user.id}) == 0
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/deletion-jobs/{job_id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    job = response.json()
+    assert job["status"] == "done"
+    assert job["deleted_items"] == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_user_failure_keeps_items(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    user = await crud.create_user(
+        db=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    await crud.create_item(db=db, item_in=ItemCreate(title="Kept"), owner_id=user.id)
+
+    # The job is recorded, then removing the user fails
+    with (
+        patch.object(User, "delete", side_effect=RuntimeError("write failed")),
+        pytest.raises(RuntimeError),
+    ):
+        client.delete(
+            f"{settings.API_V1_STR}/users/{user.id}",
+            headers=superuser_token_headers,
+        )
+
+    # Never released, so not claimed
+    await run_deletion_jobs(db)
+    assert await db.items.count_documents({"owner_id": user.id}) == 1
+    job = await db.deletion_jobs.find_one({"user_id": user.id})
+    assert job["status"] == "created"
+
+    # Claimed once stale, and cancelled as the user is still there
+    await db.deletion_jobs.update_one(
+        {"_id": job["_id"]},
+        {"$set": {"created_at": job["created_at"].replace(year=2000)}},
+    )
+    await run_deletion_jobs(db)
+    assert await db.items.count_documents({"owner_id": user.id}) == 1
+    job = await db.deletion_jobs.find_one({"user_id": user.id})
+    assert job["status"] == "cancelled"
+
+    # Removing the user again runs the job
+    response = client.delete(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    assert await db.items.count_documents({"owner_id": user.id}) == 0
+
+
 # Test deleting non-existent user
 def test_delete_user_not_found(
     client: TestClient, superuser_token_headers: dict[str, str]
@@ -297,3 +383,165 @@ async def test_update_user_email_exists(
     )
     assert response.status_code == 409
     assert response.json()["detail"] == "User with this email already exists"
+
+
+# Test cached principals are dropped when a superuser deactivates the user
+@pytest.mark.asyncio
+async def test_update_user_invalidates_cached_principal(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    email = random_email()
+    password = random_lower_string()
+    user = await crud.create_user(
+        db=db, user_create=UserCreate(email=email, password=password)
+    )
+    headers = user_authentication_headers(client=client, email=email, password=password)
+
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert response.status_code == 200
+
+    response = client.patch(
+        f"{settings.API_V1_STR}/users/{user.id}",
+        headers=superuser_token_headers,
+        json={"is_active": False},
+    )
+    assert response.status_code == 200
+
+    response = client.get(f"{settings.API_V1_STR}/users/me", headers=headers)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+# Test keyset pagination walks every user exactly once
+@pytest.mark.asyncio
+async def test_retrieve_users_keyset_pagination(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    for _ in range(3):
+        await crud.create_user(
+            db=db,
+            user_create=UserCreate(
+                email=random_email(), password=random_lower_string()
+            ),
+        )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/?limit=1000", headers=superuser_token_headers
+    )
+    all_ids = [user["id"] for user in response.json()["data"]]
+
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 2}
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/users/",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["data"]) <= 2
+        seen.extend(user["id"] for user in page["data"])
+        if not page["next_cursor"]:
+            break
+        params["after"] = page["next_cursor"]
+
+    assert seen == all_ids
+
+
+def test_retrieve_users_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/users/?after=not-a-cursor",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
+
+
+@pytest.mark.parametrize("count_mode", ["exact", "estimated", "cached"])
+def test_retrieve_users_count_modes(
+    client: TestClient, superuser_token_headers: dict[str, str], count_mode: str
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/users/?count=exact", headers=superuser_token_headers
+    )
+    exact = response.json()["count"]
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/?count={count_mode}",
+        headers=superuser_token_headers,
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] == exact
+
+
+def test_retrieve_users_without_count(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/users/?count=none", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["count"] is None
+    assert len(content["data"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_retrieve_users_search_by_email_prefix(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    email = random_email()
+    await crud.create_user(
+        db=db, user_create=UserCreate(email=email, password=random_lower_string())
+    )
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/",
+        headers=superuser_token_headers,
+        params={"q": email[:40].upper()},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert [user["email"] for user in content["data"]] == [email]
+    assert content["count"] == 1
+
+
+def test_retrieve_users_search_is_literal(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    with patch("app.core.config.settings.SEARCH_BACKEND", "regex"):
+        response = client.get(
+            f"{settings.API_V1_STR}/users/",
+            headers=superuser_token_headers,
+            params={"q": "(a+)+$"},
+        )
+    assert response.status_code == 200
+    assert response.json()["data"] == []
+
+
+def test_export_users(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/users/export", headers=normal_user_token_headers
+    )
+    assert response.status_code == 403
+
+    response = client.get(
+        f"{settings.API_V1_STR}/users/export", headers=superuser_token_headers
+    )
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert settings.FIRST_SUPERUSER in {row["email"] for row in rows}
+    assert all("hashed_password" not in row for row in rows)
@@ -0,0 +1,27 @@
+import pytest
+from fastapi import HTTPException
+from pymongo import WriteConcern
+from app.api.bulk import chunked, write_concern
+
+
+def test_write_concern() -> None:
+    assert write_concern(None, None) is None
+    assert write_concern("majority", None) == WriteConcern(w="majority")
+    assert write_concern("0", None) == WriteConcern(w=0)
+    assert write_concern(None, True) == WriteConcern(j=True)
+    assert write_concern("0", False) == WriteConcern(w=0, j=False)
+
+
+def test_write_concern_rejects_unacknowledged_journal() -> None:
+    with pytest.raises(HTTPException) as exc_info:
+        write_concern("0", True)
+    assert exc_info.value.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_chunked() -> None:
+    async def rows():
+        for i in range(5):
+            yield i
+
+    assert [chunk async for chunk in chunked(rows(), 2)] == [[0, 1], [2, 3], [4]]
@@ -0,0 +1,102 @@
+from datetime import datetime, timezone
+from unittest.mock import patch
+import pytest
+from fastapi.testclient import TestClient
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from starlette.requests import Request
+from app.api.conditional import etag_matches, make_etag
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.tests.utils.item import create_random_item
+
+
+def make_request(if_none_match: str | None) -> Request:
+    headers = []
+    if if_none_match is not None:
+        headers.append((b"if-none-match", if_none_match.encode()))
+    return Request({"type": "http", "headers": headers})
+
+
+def test_make_etag_ignores_timezone_and_sub_millisecond_digits() -> None:
+    naive = datetime(2024, 1, 2, 3, 4, 5, 123456)
+    aware = datetime(2024, 1, 2, 3, 4, 5, 123999, tzinfo=timezone.utc)
+    assert make_etag("abc", naive) == '"abc-20240102030405123"'
+    assert make_etag("abc", aware) == make_etag("abc", naive)
+
+
+def test_etag_matches() -> None:
+    etag = '"abc-20240102030405123"'
+    assert etag_matches(make_request(etag), etag)
+    assert etag_matches(make_request(f'"other", W/{etag}'), etag)
+    assert etag_matches(make_request("*"), etag)
+    assert not etag_matches(make_request('"other"'), etag)
+    assert not etag_matches(make_request(None), etag)
+
+
+@pytest.mark.asyncio
+async def test_read_item_not_modified(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    item = await create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+    response = client.get(url, headers=superuser_token_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+    client.put(url, headers=superuser_token_headers, json={"title": "Changed"})
+    response = client.get(
+        url, headers={**superuser_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["title"] == "Changed"
+
+
+@pytest.mark.asyncio
+async def test_read_item_response_cache(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    db: AsyncIOMotorDatabase,
+) -> None:
+    item = await create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/{item.id}"
+    with patch("app.core.config.settings.RESPONSE_CACHE_TTL_SECONDS", 60.0):
+        response = client.get(url, headers=superuser_token_headers)
+        assert response.status_code == 200
+        assert response_cache.get(f"items:{item.id}")
+
+        # A cached body is served without reading the collection
+        with patch("app.api.routes.items.Item.find_one") as find_one:
+            cached = client.get(url, headers=superuser_token_headers)
+        find_one.assert_not_called()
+        assert cached.json() == response.json()
+        assert cached.headers["etag"] == response.headers["etag"]
+
+        client.put(url, headers=superuser_token_headers, json={"title": "Changed"})
+        assert response_cache.get(f"items:{item.id}") is None
+        response = client.get(url, headers=superuser_token_headers)
+        assert response.json()["title"] == "Changed"
+
+
+def test_read_user_me_not_modified(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/users/me"
+    response = client.get(url, headers=normal_user_token_headers)
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+
+    response = client.get(
+        url, headers={**normal_user_token_headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
@@ -0,0 +1,76 @@
+import time
+from datetime import timedelta
+from unittest.mock import patch
+from fastapi.testclient import TestClient
+from app.core.config import settings
+from app.core.security import create_access_token
+
+
+def test_items_authorize_from_token_claims(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    with patch("app.api.deps.User.find_one") as find_one:
+        response = client.get(
+            f"{settings.API_V1_STR}/items/", headers=superuser_token_headers
+        )
+    find_one.assert_not_called()
+    assert response.status_code == 200
+
+
+def test_routes_authorize_role_and_active_claims(client: TestClient) -> None:
+    token = create_access_token(
+        "0" * 24, timedelta(minutes=5), claims={"role": "user", "active": True}
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/users/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 403
+
+    token = create_access_token(
+        "0" * 24, timedelta(minutes=5), claims={"role": "user", "active": False}
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Inactive user"
+
+
+def test_token_without_claims_reads_the_user(client: TestClient) -> None:
+    # Issued before tokens carried claims, for a user that no longer exists
+    token = create_access_token("0" * 24, timedelta(minutes=5))
+    response = client.get(
+        f"{settings.API_V1_STR}/items/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
+
+
+def test_token_with_old_claims_reads_the_user(client: TestClient) -> None:
+    # Claims older than ACCESS_TOKEN_CLAIMS_TTL_MINUTES, the user is gone since
+    issued_at = int(time.time()) - settings.ACCESS_TOKEN_CLAIMS_TTL_MINUTES * 60 - 1
+    token = create_access_token(
+        "0" * 24,
+        timedelta(minutes=5),
+        claims={"role": "superuser", "active": True, "iat": issued_at},
+    )
+    response = client.get(
+        f"{settings.API_V1_STR}/users/", headers={"Authorization": f"Bearer {token}"}
+    )
+    assert response.status_code == 404
+
+
+def test_create_item_reads_the_owner(client: TestClient) -> None:
+    # Fresh claims of a user deleted since the token was issued
+    token = create_access_token(
+        "0" * 24, timedelta(minutes=5), claims={"role": "user", "active": True}
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+    response = client.post(
+        f"{settings.API_V1_STR}/items/", headers=headers, json={"title": "Orphan"}
+    )
+    assert response.status_code == 404
+
+    response = client.post(
+        f"{settings.API_V1_STR}/items/bulk", headers=headers, json=[{"title": "Orphan"}]
+    )
+    assert response.status_code == 404
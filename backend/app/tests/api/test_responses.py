@@ -0,0 +1,31 @@
+import json
+from datetime import datetime
+from bson import ObjectId
+from app.api.responses import validated_json_response
+from app.models import ItemsPublic
+
+
+def test_validated_json_response_serializes_mongo_types() -> None:
+    owner_id = ObjectId()
+    created_at = datetime(2024, 1, 2, 3, 4, 5)
+    response = validated_json_response(
+        ItemsPublic,
+        {
+            "data": [
+                {
+                    "id": str(ObjectId()),
+                    "title": "Foo",
+                    "owner_id": owner_id,
+                    "created_at": created_at,
+                    "updated_at": created_at,
+                }
+            ],
+            "count": 1,
+            "next_cursor": None,
+        },
+    )
+    assert response.media_type == "application/json"
+    content = json.loads(response.body)
+    assert content["count"] == 1
+    assert content["data"][0]["owner_id"] == str(owner_id)
+    assert content["data"][0]["created_at"] == "2024-01-02T03:04:05"
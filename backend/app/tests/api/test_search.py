@@ -0,0 +1,84 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+import pytest
+from app.api.search import email_prefix_filter, search_filter
+
+REGEX_QUERY = {
+    "$or": [
+        {"title": {"$regex": "foo", "$options": "i"}},
+        {"description": {"$regex": "foo", "$options": "i"}},
+    ]
+}
+
+
+def make_collection(name: str, *keys: list[tuple[str, object]]) -> MagicMock:
+    collection = MagicMock()
+    collection.name = name
+    collection.index_information = AsyncMock(
+        return_value={f"index_{i}": {"key": key} for i, key in enumerate(keys)}
+    )
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_search_filter_text_backend() -> None:
+    collection = make_collection(
+        "search_text", [("_id", 1)], [("_fts", "text"), ("_ftsx", 1)]
+    )
+    with patch("app.core.config.settings.SEARCH_BACKEND", "text"):
+        query = await search_filter(
+            "foo bar", fields=("title", "description"), collection=collection
+        )
+        assert query == {"$text": {"$search": "foo bar"}}
+        # The index is remembered, the next search does not list indexes
+        await search_filter("foo", fields=("title",), collection=collection)
+    collection.index_information.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_search_filter_text_backend_without_text_index() -> None:
+    collection = make_collection("search_no_text", [("_id", 1)])
+    with patch("app.core.config.settings.SEARCH_BACKEND", "text"):
+        query = await search_filter(
+            "foo", fields=("title", "description"), collection=collection
+        )
+        assert query == REGEX_QUERY
+
+        # Not looked up again until TEXT_INDEX_RECHECK_SECONDS have passed
+        collection.index_information.return_value["text"] = {
+            "key": [("_fts", "text"), ("_ftsx", 1)]
+        }
+        query = await search_filter(
+            "foo", fields=("title", "description"), collection=collection
+        )
+        assert query == REGEX_QUERY
+        collection.index_information.assert_awaited_once()
+
+        # Picked up once they have
+        with patch("app.api.search.TEXT_INDEX_RECHECK_SECONDS", 0):
+            query = await search_filter(
+                "foo", fields=("title", "description"), collection=collection
+            )
+        assert query == {"$text": {"$search": "foo"}}
+
+
+@pytest.mark.asyncio
+async def test_search_filter_regex_backend_escapes_input() -> None:
+    collection = make_collection("search_regex")
+    with patch("app.core.config.settings.SEARCH_BACKEND", "regex"):
+        query = await search_filter(
+            "(a+)+$", fields=("title", "description"), collection=collection
+        )
+    collection.index_information.assert_not_called()
+    assert query == {
+        "$or": [
+            {"title": {"$regex": r"\(a\+\)\+\$", "$options": "i"}},
+            {"description": {"$regex": r"\(a\+\)\+\$", "$options": "i"}},
+        ]
+    }
+
+
+def test_email_prefix_filter() -> None:
+    assert email_prefix_filter("jane") is None
+    assert email_prefix_filter(" Jane.Doe@Ex") == {
+        "email": {"$regex": r"^jane\.doe@ex"}
+    }
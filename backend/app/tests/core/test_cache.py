@@ -0,0 +1,36 @@
+from unittest.mock import patch
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_hit_and_miss() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+
+def test_ttl_cache_evicts_least_recently_used() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=10)
+    with patch("app.core.cache.time.monotonic", return_value=100.0):
+        cache.set("a", 1)
+    with patch("app.core.cache.time.monotonic", return_value=111.0):
+        assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_ttl_cache_disabled_with_zero_ttl() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
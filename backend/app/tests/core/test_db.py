@@ -0,0 +1,15 @@
+from app.core.config import settings
+from app.core.db import close_mongo_connection, connect_to_mongo
+
+
+def test_connect_to_mongo_reuses_client() -> None:
+    connection = connect_to_mongo()
+    assert connect_to_mongo() is connection
+
+    client = connection.get_client()
+    assert client.options.pool_options.max_pool_size == settings.MONGODB_MAX_POOL_SIZE
+    assert client.options.pool_options.min_pool_size == settings.MONGODB_MIN_POOL_SIZE
+
+    close_mongo_connection()
+    assert connect_to_mongo() is not connection
+    close_mongo_connection()
@@ -0,0 +1,91 @@
+import pytest
+from unittest.mock import patch
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app import crud
+from app.core.deletion_jobs import (
+    enqueue_user_deletion,
+    release_user_deletion,
+    run_deletion_jobs,
+)
+from app.models import ItemCreate, UserCreate
+from app.tests.utils.utils import random_email, random_lower_string
+
+
+async def _create_items(db: AsyncIOMotorDatabase, owner_id: str, count: int) -> None:
+    for i in range(count):
+        await crud.create_item(
+            db=db, item_in=ItemCreate(title=f"Item {i}"), owner_id=owner_id
+        )
+
+
+@pytest.mark.asyncio
+async def test_run_deletion_jobs_deletes_in_batches(db: AsyncIOMotorDatabase) -> None:
+    owner_id = str(ObjectId())
+    await _create_items(db, owner_id, 5)
+
+    job = await enqueue_user_deletion(db, owner_id)
+    # Enqueueing again is a no-op returning the same job
+    assert (await enqueue_user_deletion(db, owner_id)).id == job.id
+
+    # Not claimable until released
+    assert await run_deletion_jobs(db) == 0
+    assert await db.items.count_documents({"owner_id": owner_id}) == 5
+    await release_user_deletion(db, job)
+
+    with patch("app.core.config.settings.DELETION_BATCH_SIZE", 2):
+        assert await run_deletion_jobs(db) >= 1
+
+    assert await db.items.count_documents({"owner_id": owner_id}) == 0
+    doc = await db.deletion_jobs.find_one({"_id": ObjectId(job.id)})
+    assert doc["status"] == "done"
+    assert doc["deleted_items"] == 5
+    assert doc["finished_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_run_deletion_jobs_resumes_stale_job(db: AsyncIOMotorDatabase) -> None:
+    owner_id = str(ObjectId())
+    await _create_items(db, owner_id, 3)
+    job = await enqueue_user_deletion(db, owner_id)
+
+    # A worker died after deleting the first item and recording it
+    first = await db.items.find_one({"owner_id": owner_id}, sort=[("_id", 1)])
+    await db.items.delete_one({"_id": first["_id"]})
+    await db.deletion_jobs.update_one(
+        {"_id": ObjectId(job.id)},
+        {
+            "$set": {
+                "status": "running",
+                "last_id": str(first["_id"]),
+                "deleted_items": 1,
+                "claimed_at": job.created_at.replace(year=2000, tzinfo=None),
+            }
+        },
+    )
+
+    await run_deletion_jobs(db)
+
+    assert await db.items.count_documents({"owner_id": owner_id}) == 0
+    doc = await db.deletion_jobs.find_one({"_id": ObjectId(job.id)})
+    assert doc["status"] == "done"
+    assert doc["deleted_items"] == 3
+
+
+@pytest.mark.asyncio
+async def test_run_deletion_jobs_cancels_job_of_existing_user(
+    db: AsyncIOMotorDatabase,
+) -> None:
+    user = await crud.create_user(
+        db=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    await _create_items(db, user.id, 2)
+    job = await enqueue_user_deletion(db, user.id)
+    await release_user_deletion(db, job)
+
+    await run_deletion_jobs(db)
+
+    assert await db.items.count_documents({"owner_id": user.id}) == 2
+    doc = await db.deletion_jobs.find_one({"_id": ObjectId(job.id)})
+    assert doc["status"] == "cancelled"
@@ -0,0 +1,65 @@
+import pytest
+from unittest.mock import patch
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.email_outbox import EmailDispatcher, enqueue_email
+from app.tests.utils.utils import random_email
+
+
+async def _enqueue(db: AsyncIOMotorDatabase) -> ObjectId:
+    message = await enqueue_email(
+        db, email_to=random_email(), subject="Subject", html_content="<p>Hi</p>"
+    )
+    return ObjectId(message.id)
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_sends_pending_email(db: AsyncIOMotorDatabase) -> None:
+    message_id = await _enqueue(db)
+    dispatcher = EmailDispatcher(db)
+    with patch.object(EmailDispatcher, "_send") as send:
+        assert await dispatcher.dispatch_batch() >= 1
+    assert send.called
+
+    doc = await db.email_outbox.find_one({"_id": message_id})
+    assert doc["status"] == "sent"
+    assert doc["sent_at"] is not None
+    assert doc["purge_at"] > doc["sent_at"]
+    assert "html_content" not in doc
+
+    # Already delivered, nothing left to claim
+    with patch.object(EmailDispatcher, "_send") as send:
+        assert await dispatcher.dispatch_batch() == 0
+    assert not send.called
+
+
+@pytest.mark.asyncio
+async def test_dispatch_batch_retries_with_backoff(db: AsyncIOMotorDatabase) -> None:
+    message_id = await _enqueue(db)
+    dispatcher = EmailDispatcher(db)
+    with (
+        patch("app.core.config.settings.EMAIL_MAX_ATTEMPTS", 2),
+        patch.object(EmailDispatcher, "_send", side_effect=OSError("relay down")),
+    ):
+        await dispatcher.dispatch_batch()
+        doc = await db.email_outbox.find_one({"_id": message_id})
+        assert doc["status"] == "pending"
+        assert doc["attempts"] == 1
+        # Kept for the next attempt
+        assert doc["html_content"] == "<p>Hi</p>"
+        assert doc["last_error"] == "relay down"
+        assert doc["next_attempt_at"] > doc["claimed_at"]
+
+        # Not due yet, the backoff keeps it out of the next batch
+        assert await dispatcher.dispatch_batch() == 0
+
+        await db.email_outbox.update_one(
+            {"_id": message_id}, {"$set": {"next_attempt_at": doc["claimed_at"]}}
+        )
+        await dispatcher.dispatch_batch()
+
+    doc = await db.email_outbox.find_one({"_id": message_id})
+    assert doc["status"] == "failed"
+    assert doc["attempts"] == 2
+    assert doc["purge_at"] is not None
+    assert "html_content" not in doc
@@ -0,0 +1,43 @@
+from datetime import timedelta
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from pymongo import monitoring
+from app.core.config import settings
+from app.core.metrics import CommandMetrics
+
+
+def _sample(name: str, labels: dict[str, str]) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    labels = {"route": "users-read_user_me", "method": "GET", "status": "200"}
+    before = _sample("http_request_duration_seconds_count", labels)
+    client.get(f"{settings.API_V1_STR}/users/me", headers=superuser_token_headers)
+    assert _sample("http_request_duration_seconds_count", labels) == before + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert "http_requests_in_flight" in response.text
+    assert 'cache_hits_total{cache="principal"}' in response.text
+    assert "password_hash_queue_depth" in response.text
+
+
+def test_command_metrics_records_collection() -> None:
+    listener = CommandMetrics()
+    labels = {"collection": "items", "command": "find"}
+    before = _sample("mongodb_command_duration_seconds_count", labels)
+
+    address = ("localhost", 27017)
+    command = {"find": "items", "filter": {}}
+    listener.started(monitoring.CommandStartedEvent(command, "app", 1, address, 1))
+    listener.succeeded(
+        monitoring.CommandSucceededEvent(
+            timedelta(microseconds=2500), {"ok": 1}, "find", 1, address, 1
+        )
+    )
+
+    assert _sample("mongodb_command_duration_seconds_count", labels) == before + 1
+    assert listener._collections == {}
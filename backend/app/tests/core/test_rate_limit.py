@@ -0,0 +1,36 @@
+import pytest
+from unittest.mock import patch
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from app.core.rate_limit import Bucket, MemoryRateLimiter, MongoRateLimiter
+
+BUCKET = Bucket(burst=3, per_minute=60)
+
+
+@pytest.mark.asyncio
+async def test_memory_rate_limiter() -> None:
+    limiter = MemoryRateLimiter(maxsize=10)
+    with patch("app.core.rate_limit.time.monotonic", return_value=100.0):
+        assert [await limiter.take("a", BUCKET) for _ in range(3)] == [0, 0, 0]
+        assert await limiter.take("a", BUCKET) == pytest.approx(1.0)
+        # Buckets are independent
+        assert await limiter.take("b", BUCKET) == 0
+
+    # One token per second comes back
+    with patch("app.core.rate_limit.time.monotonic", return_value=101.5):
+        assert await limiter.take("a", BUCKET) == 0
+        assert await limiter.take("a", BUCKET) == pytest.approx(0.5)
+
+
+@pytest.mark.asyncio
+async def test_mongo_rate_limiter(db: AsyncIOMotorDatabase) -> None:
+    limiter = MongoRateLimiter(db)
+    results = [await limiter.take("test:mongo", BUCKET) for _ in range(4)]
+    assert results[:3] == [0, 0, 0]
+    assert 0 < results[3] <= 1.0
+
+    doc = await db.rate_limits.find_one({"_id": "test:mongo"})
+    assert doc["tokens"] < 1
+    assert doc["expires_at"] > doc["updated_at"]
+
+    # Another worker sees the same bucket
+    assert await MongoRateLimiter(db).take("test:mongo", BUCKET) > 0
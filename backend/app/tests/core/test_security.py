@@ -0,0 +1,86 @@
+import pytest
+from datetime import timedelta
+from unittest.mock import patch
+from jwt.exceptions import InvalidTokenError
+from app.core.cache import token_cache
+from app.core.config import settings
+from app.core.security import (
+    PasswordHasherOverloaded,
+    calibrate_bcrypt_rounds,
+    configure_password_hashing,
+    create_access_token,
+    decode_access_token,
+    get_password_hash,
+    get_password_hash_async,
+    password_hash_queue_depth,
+    password_needs_update,
+    verify_password_async,
+)
+
+
+@pytest.mark.asyncio
+async def test_password_hash_async_round_trip() -> None:
+    hashed = await get_password_hash_async("correct horse battery")
+    assert await verify_password_async("correct horse battery", hashed)
+    assert not await verify_password_async("wrong password", hashed)
+    assert password_hash_queue_depth() == 0
+
+
+@pytest.mark.asyncio
+async def test_password_hash_async_overloaded() -> None:
+    with patch("app.core.config.settings.PASSWORD_HASH_MAX_QUEUE", 0):
+        with pytest.raises(PasswordHasherOverloaded):
+            await get_password_hash_async("correct horse battery")
+    assert password_hash_queue_depth() == 0
+
+
+def test_decode_access_token_caches_claims() -> None:
+    token = create_access_token("some-user", timedelta(minutes=5))
+    token_cache.clear()
+
+    token_data = decode_access_token(token)
+    assert token_data.sub == "some-user"
+    with patch("app.core.security.jwt.decode") as decode:
+        assert decode_access_token(token) is token_data
+        decode.assert_not_called()
+
+
+def test_decode_access_token_rejects_tampered_token() -> None:
+    token = create_access_token("some-user", timedelta(minutes=5))
+    decode_access_token(token)
+
+    header, payload, signature = token.split(".")
+    forged = ".".join([header, payload + "x", signature])
+    with pytest.raises(InvalidTokenError):
+        decode_access_token(forged)
+
+
+def test_decode_access_token_expires_with_token() -> None:
+    token = create_access_token("some-user", timedelta(seconds=-1))
+    with pytest.raises(InvalidTokenError):
+        decode_access_token(token)
+    assert token_cache.get(token) is None
+
+
+def test_configure_password_hashing() -> None:
+    try:
+        configure_password_hashing(5)
+        hashed = get_password_hash("correct horse battery")
+        assert hashed.startswith("$2b$05$")
+        assert not password_needs_update(hashed)
+
+        configure_password_hashing(4)
+        assert password_needs_update(hashed)
+        configure_password_hashing(4, tolerance=1)
+        assert not password_needs_update(hashed)
+    finally:
+        configure_password_hashing(settings.BCRYPT_ROUNDS)
+
+
+def test_calibrate_bcrypt_rounds() -> None:
+    # Verify measured at 2ms for the calibration cost of 8 rounds
+    with patch("app.core.security.statistics.median", return_value=0.002):
+        assert calibrate_bcrypt_rounds(250) == 14
+        assert calibrate_bcrypt_rounds(255) == 14
+        # Never below BCRYPT_MIN_ROUNDS
+        assert calibrate_bcrypt_rounds(1) == settings.BCRYPT_MIN_ROUNDS
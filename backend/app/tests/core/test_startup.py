@@ -0,0 +1,69 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock, patch
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import ServerSelectionTimeoutError
+from app.core.config import settings
+from app.core.db import init_db
+from app.core.startup import ensure_indexes, run_startup, wait_for_mongo
+from app.models import User
+
+
+def _client(ping: AsyncMock) -> MagicMock:
+    client = MagicMock()
+    client.admin.command = ping
+    return client
+
+
+@pytest.mark.asyncio
+async def test_wait_for_mongo_backs_off() -> None:
+    ping = AsyncMock(
+        side_effect=[ServerSelectionTimeoutError("down")] * 3 + [{"ok": 1}]
+    )
+    with patch("app.core.startup.asyncio.sleep", new=AsyncMock()) as sleep:
+        await wait_for_mongo(_client(ping))
+    assert ping.await_count == 4
+    assert [call.args[0] for call in sleep.await_args_list] == [0.05, 0.1, 0.2]
+
+
+@pytest.mark.asyncio
+async def test_wait_for_mongo_gives_up() -> None:
+    ping = AsyncMock(side_effect=ServerSelectionTimeoutError("down"))
+    with (
+        patch("app.core.config.settings.MONGODB_PING_TIMEOUT_SECONDS", 0),
+        pytest.raises(ServerSelectionTimeoutError),
+    ):
+        await wait_for_mongo(_client(ping))
+    assert ping.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    await ensure_indexes(db)
+    indexes = await db.refresh_tokens.index_information()
+    assert any(index.get("expireAfterSeconds") == 0 for index in indexes.values())
+
+
+@pytest.mark.asyncio
+async def test_init_db_seeds_superuser_once(db: AsyncIOMotorDatabase) -> None:
+    await init_db(db)
+    await init_db(db)
+    assert await db.users.count_documents({"email": settings.FIRST_SUPERUSER}) == 1
+    user = await User.find_by_email(db=db, email=settings.FIRST_SUPERUSER)
+    assert user.is_superuser
+
+
+@pytest.mark.asyncio
+async def test_run_startup_reports_phases(db: AsyncIOMotorDatabase) -> None:
+    with (
+        patch("app.core.config.settings.STARTUP_INIT_DB", True),
+        patch("app.core.startup.get_database", return_value=db),
+        patch("app.core.startup.wait_for_mongo", new=AsyncMock()),
+    ):
+        timings = await run_startup()
+    assert set(timings.phases) == {
+        "ping",
+        "indexes",
+        "bcrypt_calibration",
+        "seed",
+        "index_audit",
+    }
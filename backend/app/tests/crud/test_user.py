@@ -1,8 +1,11 @@
+import asyncio
 import pytest
+from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from app import crud
-from app.core.security import verify_password
-from app.models import UserCreate, UserUpdate
+from app.core.config import settings
+from app.core.security import configure_password_hashing, verify_password
+from app.models import User, UserCreate, UserUpdate
 from app.tests.utils.utils import random_email, random_lower_string
 
 
@@ -31,6 +34,26 @@ async def test_authenticate_user(db: AsyncIOMotorDatabase) -> None:
     assert user.email == authenticated_user.email
 
 
+@pytest.mark.asyncio
+async def test_authenticate_rehashes_outdated_hash(db: AsyncIOMotorDatabase) -> None:
+    email = random_email()
+    password = random_lower_string()
+    try:
+        configure_password_hashing(4)
+        await crud.create_user(
+            db=db, user_create=UserCreate(email=email, password=password)
+        )
+        configure_password_hashing(5)
+        assert await crud.authenticate(db=db, email=email, password=password)
+        await asyncio.gather(*crud._rehash_tasks)
+    finally:
+        configure_password_hashing(settings.BCRYPT_ROUNDS)
+
+    db_user = await db.users.find_one({"email": email})
+    assert db_user["hashed_password"].startswith("$2b$05$")
+    assert verify_password(password, db_user["hashed_password"])
+
+
 @pytest.mark.asyncio
 async def test_not_authenticate_user(db: AsyncIOMotorDatabase) -> None:
     email = random_email()
@@ -115,3 +138,22 @@ async def test_update_user(db: AsyncIOMotorDatabase) -> None:
     db_user = await db.users.find_one({"_id": user.id})
     assert db_user is not None
     assert verify_password(new_password, db_user["hashed_password"])
+
+
+@pytest.mark.asyncio
+async def test_find_one_and_update_returns_updated_user(
+    db: AsyncIOMotorDatabase,
+) -> None:
+    user_in = UserCreate(email=random_email(), password=random_lower_string())
+    user = await crud.create_user(db=db, user_create=user_in)
+    updated_user = await crud.find_one_and_update(
+        User, db=db, query={"_id": user.id}, update={"$set": {"full_name": "Jane"}}
+    )
+    assert updated_user is not None
+    assert updated_user.id == user.id
+    assert updated_user.full_name == "Jane"
+
+    missing = await crud.find_one_and_update(
+        User, db=db, query={"_id": str(ObjectId())}, update={"$set": {"full_name": "X"}}
+    )
+    assert missing is None
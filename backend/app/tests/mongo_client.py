@@ -19,6 +19,12 @@ class MongoHandler:
         """
         return self.__db_client[self.__db_name][name]
 
+    def __getitem__(self, name: str):
+        """
+        Allows access like db["users"], as used by Model.get_collection(db).
+        """
+        return self.__db_client[self.__db_name][name]
+
     async def get_sample_resource(self, resource_id: ObjectId):
         return await self.__db_client[self.__db_name][self.__collection_name].find_one(
             {"_id": ObjectId(resource_id)}
@@ -0,0 +1,46 @@
+import pytest
+from unittest.mock import AsyncMock, patch
+from app.index_audit import IndexAuditError, plan_stages, run_index_audit
+
+INDEXED_PLAN = {
+    "stage": "LIMIT",
+    "inputStage": {
+        "stage": "FETCH",
+        "inputStage": {"stage": "IXSCAN", "indexName": "owner_id_1_created_at_-1"},
+    },
+}
+
+UNINDEXED_PLAN = {
+    "stage": "SORT",
+    "inputStage": {"stage": "COLLSCAN", "direction": "forward"},
+}
+
+
+def test_plan_stages() -> None:
+    assert plan_stages(INDEXED_PLAN) == ["LIMIT", "FETCH", "IXSCAN"]
+    assert plan_stages({"queryPlan": UNINDEXED_PLAN}) == ["SORT", "COLLSCAN"]
+
+
+@pytest.mark.asyncio
+async def test_run_index_audit_fail_mode() -> None:
+    with (
+        patch("app.core.config.settings.INDEX_AUDIT", "fail"),
+        patch(
+            "app.index_audit.audit_indexes",
+            AsyncMock(return_value=["users list: COLLSCAN"]),
+        ),
+    ):
+        with pytest.raises(IndexAuditError):
+            await run_index_audit(db=object())
+
+
+@pytest.mark.asyncio
+async def test_run_index_audit_warn_mode() -> None:
+    with (
+        patch("app.core.config.settings.INDEX_AUDIT", "warn"),
+        patch(
+            "app.index_audit.audit_indexes",
+            AsyncMock(return_value=["users list: COLLSCAN"]),
+        ),
+    ):
+        await run_index_audit(db=object())
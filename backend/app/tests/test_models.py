@@ -0,0 +1,16 @@
+from app.models import ItemPublic, User, UserPublic, projection_for
+
+
+def test_projection_for_response_models() -> None:
+    user_projection = projection_for(UserPublic)
+    assert "hashed_password" not in user_projection
+    assert user_projection["email"] == 1
+    assert "id" not in user_projection
+
+    assert "hashed_password" in projection_for(User)
+    assert set(projection_for(ItemPublic)) >= {"title", "description", "owner_id"}
+
+
+def test_projection_for_returns_a_copy() -> None:
+    projection_for(UserPublic)["hashed_password"] = 1
+    assert "hashed_password" not in projection_for(UserPublic)
@@ -0,0 +1,41 @@
+from app.startup_profile import (
+    DEFERRED_MODULES,
+    FIRST_REQUEST_BUDGET_MS,
+    IMPORT_BUDGET_MS,
+    format_tree,
+    parse_importtime,
+    profile_startup,
+)
+
+IMPORTTIME = """\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 |     b.c
+import time:       200 |        300 |   b
+import time:      1500 |       1500 |   d
+import time:       500 |       2300 | a
+import time:        50 |         50 | e
+"""
+
+
+def test_parse_importtime() -> None:
+    roots = parse_importtime(IMPORTTIME)
+    assert [node.name for node in roots] == ["a", "e"]
+    a = roots[0]
+    assert (a.self_ms, a.cumulative_ms) == (0.5, 2.3)
+    assert [node.name for node in a.children] == ["b", "d"]
+    assert [node.name for node in a.children[0].children] == ["b.c"]
+
+    lines = format_tree(roots, min_ms=1)
+    assert [line.split()[-1] for line in lines] == ["a", "d"]
+
+
+def test_startup_within_budget() -> None:
+    profile = profile_startup(init_db=False)
+
+    assert profile.deferred_loaded == [], (
+        f"{profile.deferred_loaded} imported by app.main, "
+        f"expected deferred: {DEFERRED_MODULES}"
+    )
+    assert any(node.name == "app.main" for node in profile.imports)
+    assert profile.import_ms < IMPORT_BUDGET_MS
+    assert profile.first_request_ms < FIRST_REQUEST_BUDGET_MS
@@ -0,0 +1,40 @@
+from pathlib import Path
+from jinja2 import Template
+from app.utils import (
+    email_templates,
+    preload_email_templates,
+    render_email_template,
+    render_email_templates,
+)
+
+TEMPLATES_DIR = Path(__file__).parent.parent / "email-templates" / "build"
+
+
+def test_render_email_template_matches_source() -> None:
+    context = {"project_name": "Project", "email": "jane@example.com"}
+    expected = Template((TEMPLATES_DIR / "test_email.html").read_text()).render(context)
+    assert render_email_template(template_name="test_email.html", context=context) == (
+        expected
+    )
+
+
+def test_render_email_templates_batch() -> None:
+    contexts = [
+        {"project_name": "Project", "email": f"user{i}@example.com"} for i in range(3)
+    ]
+    rendered = render_email_templates(
+        template_name="test_email.html", contexts=contexts
+    )
+    assert len(rendered) == 3
+    for context, html in zip(contexts, rendered):
+        assert context["email"] in html
+
+
+def test_preload_email_templates() -> None:
+    preload_email_templates()
+    cache = email_templates().cache
+    assert cache is not None
+    cached_names = {name for _, name in cache.keys()}
+    assert {"test_email.html", "reset_password.html", "new_account.html"} <= (
+        cached_names
+    )
@@ -1,16 +1,20 @@
 import logging
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Iterable
 
-import emails  # type: ignore
 import jwt
-from jinja2 import Template
 from jwt.exceptions import InvalidTokenError
+from motor.motor_asyncio import AsyncIOMotorDatabase
 
 from app.core import security
 from app.core.config import settings
+from app.core.email_outbox import enqueue_email
+
+if TYPE_CHECKING:
+    from jinja2 import Environment
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -22,37 +26,58 @@ class EmailData:
     subject: str
 
 
+@lru_cache
+def email_templates() -> "Environment":
+    """
+    Templates are compiled once per worker and kept in the environment's cache,
+    the bytecode cache lets other workers and restarts skip the compile step.
+    In local mode templates are reloaded when the file changes.
+
+    Created on first use, so workers without email never import jinja2.
+    """
+    from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+    return Environment(
+        loader=FileSystemLoader(Path(__file__).parent / "email-templates" / "build"),
+        bytecode_cache=FileSystemBytecodeCache(),
+        auto_reload=settings.ENVIRONMENT == "local",
+    )
+
+
+def preload_email_templates() -> None:
+    """Load and compile every email template, called at startup."""
+    templates = email_templates()
+    for template_name in templates.list_templates(extensions=["html"]):
+        templates.get_template(template_name)
+
+
 def render_email_template(*, template_name: str, context: dict[str, Any]) -> str:
-    template_str = (
-        Path(__file__).parent / "email-templates" / "build" / template_name
-    ).read_text()
-    html_content = Template(template_str).render(context)
-    return html_content
+    return email_templates().get_template(template_name).render(context)
+
+
+def render_email_templates(
+    *, template_name: str, contexts: Iterable[dict[str, Any]]
+) -> list[str]:
+    """Render one template for many recipients, e.g. a batch of notifications."""
+    template = email_templates().get_template(template_name)
+    return [template.render(context) for context in contexts]
 
 
-def send_email(
+async def send_email_async(
     *,
+    db: AsyncIOMotorDatabase,
     email_to: str,
     subject: str = "",
     html_content: str = "",
 ) -> None:
+    """
+    Queue an email in the outbox and return immediately, the background
+    dispatcher started in the app lifespan delivers it.
+    """
     assert settings.emails_enabled, "no provided configuration for email variables"
-    message = emails.Message(
-        subject=subject,
-        html=html_content,
-        mail_from=(settings.EMAILS_FROM_NAME, settings.EMAILS_FROM_EMAIL),
+    await enqueue_email(
+        db, email_to=email_to, subject=subject, html_content=html_content
     )
-    smtp_options = {"host": settings.SMTP_HOST, "port": settings.SMTP_PORT}
-    if settings.SMTP_TLS:
-        smtp_options["tls"] = True
-    elif settings.SMTP_SSL:
-        smtp_options["ssl"] = True
-    if settings.SMTP_USER:
-        smtp_options["user"] = settings.SMTP_USER
-    if settings.SMTP_PASSWORD:
-        smtp_options["password"] = settings.SMTP_PASSWORD
-    response = message.send(to=email_to, smtp=smtp_options)
-    logger.info(f"send email result: {response}")
 
 
 def generate_test_email(email_to: str) -> EmailData:
@@ -3,8 +3,6 @@
 set -e
 set -x
 
-# Let the DB start
-python app/backend_pre_start.py
-
-# Create initial data in DB
+# Wait for the DB, create indexes and initial data; workers repeat these
+# steps in their lifespan, so this is only needed to fail a deploy early
 python app/initial_data.py